@@ -0,0 +1,117 @@
+# Virtualized card list for the GUI (achievements window)
+# Cards are drawn on a tk.Canvas as a rectangle and three text items, and only for the cards in
+# (or just around) the viewport: scrolling draws the cards coming in and deletes the ones going
+# out. Every card has a one-byte state (locked/achieved/current...) and a state change only
+# re-colours that card's canvas items, so the window can be kept and reused instead of rebuilt.
+
+import tkinter as tk
+
+# Card size on the canvas, in pixels
+CARD_HEIGHT = 78
+CARD_GAP = 10
+CARD_PITCH = CARD_HEIGHT + CARD_GAP
+CARD_PADX = 10
+# Cards drawn ahead above and below the viewport
+OVERSCAN = 2
+
+TITLE_FONT = ('Consolas', 11, 'bold')
+DETAIL_FONT = ('Consolas', 9)
+STATUS_FONT = ('Consolas', 8, 'bold')
+
+
+class CardList:
+    def __init__(self, parent, format_card, styles, scrollbar, **options):
+        """format_card(position) -> (title, detail); styles[state] -> (card colour, text colour, status)"""
+        self.format_card = format_card
+        self.styles = styles
+        self.scrollbar = scrollbar
+        options.setdefault('yscrollincrement', CARD_PITCH // 2)
+        self.canvas = tk.Canvas(parent, highlightthickness=0, yscrollcommand=self._on_scroll, **options)
+        self.scrollbar.config(command=self.canvas.yview)
+        # State of every card, drawn or not
+        self.states = bytearray()
+        self.width = int(options.get('width', 500))
+        # position -> (card, title, detail, status) canvas items of the drawn cards
+        self._drawn = {}
+
+        self.canvas.bind('<Configure>', self._on_resize)
+        self.canvas.bind('<MouseWheel>', self._on_wheel)
+        self.canvas.bind('<Button-4>', self._on_wheel)
+        self.canvas.bind('<Button-5>', self._on_wheel)
+
+    def pack(self, **options):
+        self.canvas.pack(**options)
+
+    def set_cards(self, states):
+        """Replace every card (their number and states), e.g. after the achievements changed"""
+        for items in self._drawn.values():
+            self.canvas.delete(*items)
+        self._drawn.clear()
+        self.states = bytearray(states)
+        self.canvas.config(scrollregion=(0, 0, self.width, len(self.states) * CARD_PITCH))
+        self.render()
+
+    def set_states(self, states):
+        """Re-colour only the cards whose state changed and return their positions"""
+        changed = [position for position, (old, new) in enumerate(zip(self.states, states)) if old != new]
+        for position in changed:
+            self.states[position] = states[position]
+            if position in self._drawn:
+                self._style(position)
+        return changed
+
+    def refresh(self):
+        """Re-format the texts of the drawn cards, the others get them when scrolled into view"""
+        for position, (_, title, detail, _) in self._drawn.items():
+            title_text, detail_text = self.format_card(position)
+            self.canvas.itemconfig(title, text=title_text)
+            self.canvas.itemconfig(detail, text=detail_text)
+
+    def render(self):
+        """Draw the cards around the viewport and delete the ones that scrolled away"""
+        top = int(self.canvas.canvasy(0))
+        first = max(0, top // CARD_PITCH - OVERSCAN)
+        last = min(len(self.states), (top + self.canvas.winfo_height()) // CARD_PITCH + 1 + OVERSCAN)
+        for position in [position for position in self._drawn if not first <= position < last]:
+            self.canvas.delete(*self._drawn.pop(position))
+        for position in range(first, last):
+            if position not in self._drawn:
+                self._draw(position)
+
+    def _draw(self, position):
+        title, detail = self.format_card(position)
+        y = position * CARD_PITCH + CARD_GAP // 2
+        x = CARD_PADX + 12
+        self._drawn[position] = (
+            self.canvas.create_rectangle(CARD_PADX, y, self.width - CARD_PADX, y + CARD_HEIGHT, width=1),
+            self.canvas.create_text(x, y + 8, text=title, font=TITLE_FONT, anchor='nw'),
+            self.canvas.create_text(x, y + 32, text=detail, font=DETAIL_FONT, anchor='nw'),
+            self.canvas.create_text(x, y + 54, font=STATUS_FONT, anchor='nw')
+        )
+        self._style(position)
+
+    def _style(self, position):
+        card_bg, text_color, status = self.styles[self.states[position]]
+        card, title, detail, status_item = self._drawn[position]
+        self.canvas.itemconfig(card, fill=card_bg, outline=text_color)
+        self.canvas.itemconfig(title, fill=text_color)
+        self.canvas.itemconfig(detail, fill=text_color)
+        self.canvas.itemconfig(status_item, fill=text_color, text=status)
+
+    def _on_scroll(self, first, last):
+        """Canvas yscrollcommand: follow the view with the scrollbar and draw what came into it"""
+        self.scrollbar.set(first, last)
+        self.render()
+
+    def _on_resize(self, event):
+        if event.width != self.width:
+            # Card rectangles span the width, redraw them at the new one
+            self.width = event.width
+            self.set_cards(self.states)
+        else:
+            self.render()
+
+    def _on_wheel(self, event):
+        step = -1 if event.num == 4 or getattr(event, 'delta', 0) > 0 else 1
+        self.canvas.yview_scroll(step, 'units')
+        return 'break'
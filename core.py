@@ -0,0 +1,232 @@
+# Domain model shared by the GUI and the Console version
+# Catalogs keep a table column by column: stable ids and points/prices in int32 arrays, names
+# in a list and flags in a bytearray. Records are small __slots__ objects handed out on access.
+
+from array import array
+
+
+class Activity:
+    __slots__ = ('id', 'name', 'points', 'daily')
+
+    def __init__(self, id, name, points, daily):
+        self.id = id
+        self.name = name
+        self.points = points
+        self.daily = daily
+
+
+class Reward:
+    __slots__ = ('id', 'name', 'price', 'regular')
+
+    def __init__(self, id, name, price, regular):
+        self.id = id
+        self.name = name
+        self.price = price
+        self.regular = regular
+
+
+class Achievement:
+    __slots__ = ('name', 'points_required', 'tasks_required')
+
+    def __init__(self, name, points_required, tasks_required):
+        self.name = name
+        self.points_required = points_required
+        self.tasks_required = tasks_required
+
+
+class User:
+    __slots__ = ('name', 'total_points', 'activities_completed', 'alltime_points', 'ledger_seq')
+
+    def __init__(self, name, total_points=0, activities_completed=0, alltime_points=0, ledger_seq=0):
+        self.name = name
+        self.total_points = total_points
+        self.activities_completed = activities_completed
+        self.alltime_points = alltime_points
+        self.ledger_seq = ledger_seq
+
+    def complete(self, points):
+        """Credit a completed activity"""
+        self.total_points += points
+        self.alltime_points += points
+        self.activities_completed += 1
+
+    def can_afford(self, price):
+        return self.total_points >= price
+
+    def redeem(self, price):
+        """Spend points on a reward, False if there are not enough"""
+        if not self.can_afford(price):
+            return False
+        self.total_points -= price
+        return True
+
+    def to_row(self):
+        """Row for storage / the ledger"""
+        # User.__slots__, not self.__slots__: subclasses (the console User) declare empty slots
+        return {col: getattr(self, col) for col in User.__slots__}
+
+
+class Catalog:
+    # Storage columns of (id, name, value, flag) and the record type handed out
+    COLUMNS = ()
+    RECORD = None
+    __slots__ = ('ids', 'names', 'values', 'flags', '_positions', '_next_id')
+
+    def __init__(self, columns=None):
+        id_col, name_col, value_col, flag_col = self.COLUMNS
+        columns = columns or {id_col: [], name_col: [], value_col: [], flag_col: []}
+        self.ids = array('i', columns[id_col])
+        self.names = list(columns[name_col])
+        self.values = array('i', columns[value_col])
+        self.flags = bytearray(bool(flag) for flag in columns[flag_col])
+        # id -> position
+        self._positions = {item_id: position for position, item_id in enumerate(self.ids)}
+        self._next_id = max(self.ids, default=0) + 1
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, position):
+        return self.RECORD(self.ids[position], self.names[position], self.values[position],
+                           bool(self.flags[position]))
+
+    def __iter__(self):
+        for position in range(len(self.names)):
+            yield self[position]
+
+    def append(self, name, value, flag):
+        """Add an item with the next free id and return that id"""
+        item_id = self._next_id
+        self._next_id += 1
+        self._positions[item_id] = len(self.ids)
+        self.ids.append(item_id)
+        self.names.append(name)
+        self.values.append(value)
+        self.flags.append(bool(flag))
+        return item_id
+
+    def update(self, position, name, value, flag):
+        self.names[position] = name
+        self.values[position] = value
+        self.flags[position] = bool(flag)
+
+    def __delitem__(self, position):
+        del self._positions[self.ids[position]]
+        del self.ids[position]
+        del self.names[position]
+        del self.values[position]
+        del self.flags[position]
+        # Items after it moved up by one
+        for later in range(position, len(self.ids)):
+            self._positions[self.ids[later]] = later
+
+    def row(self, position):
+        """Row dict in storage column names"""
+        return dict(zip(self.COLUMNS, (self.ids[position], self.names[position], self.values[position],
+                                       bool(self.flags[position]))))
+
+    def position_of(self, item_id):
+        """Position of the item with that id, None if there is none"""
+        return self._positions.get(item_id)
+
+    def sections(self):
+        """Positions split into (flagged, not flagged), each sorted by value ascending"""
+        flagged = [position for position in range(len(self.names)) if self.flags[position]]
+        unflagged = [position for position in range(len(self.names)) if not self.flags[position]]
+        return sorted(flagged, key=self.values.__getitem__), sorted(unflagged, key=self.values.__getitem__)
+
+    def section_keys(self):
+        """Like sections(), as sorted (value, id) keys"""
+        flagged = sorted((self.values[position], self.ids[position])
+                         for position in range(len(self.names)) if self.flags[position])
+        unflagged = sorted((self.values[position], self.ids[position])
+                           for position in range(len(self.names)) if not self.flags[position])
+        return flagged, unflagged
+
+
+class ActivityCatalog(Catalog):
+    COLUMNS = ('activity_id', 'activity_name', 'activity_points', 'daily_task')
+    RECORD = Activity
+    __slots__ = ()
+
+
+class RewardCatalog(Catalog):
+    COLUMNS = ('reward_id', 'reward_name', 'reward_price', 'regular_reward')
+    RECORD = Reward
+    __slots__ = ()
+
+
+class AchievementCatalog:
+    __slots__ = ('names', 'points_required', 'tasks_required')
+
+    def __init__(self, columns=None):
+        columns = columns or {'achievement_name': [], 'points_required': [], 'tasks_required': []}
+        self.names = [name.strip() for name in columns['achievement_name']]
+        self.points_required = array('i', columns['points_required'])
+        self.tasks_required = array('i', columns['tasks_required'])
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, position):
+        return Achievement(self.names[position], self.points_required[position], self.tasks_required[position])
+
+    def __iter__(self):
+        for position in range(len(self.names)):
+            yield self[position]
+
+
+def users_from_columns(columns):
+    """User objects from the users table columns"""
+    return [User(*values) for values in zip(*(columns[col] for col in User.__slots__))]
+
+
+class UserStore:
+    """Users keyed by name with per-user dirty flags, so a save only writes the users that changed"""
+    __slots__ = ('_users', '_by_name', '_dirty')
+
+    def __init__(self, users=()):
+        self._users = list(users)
+        self._by_name = {user.name: user for user in self._users}
+        # Insertion ordered set of changed user names
+        self._dirty = {}
+
+    def __len__(self):
+        return len(self._users)
+
+    def __iter__(self):
+        return iter(self._users)
+
+    def __getitem__(self, position):
+        return self._users[position]
+
+    def get(self, name):
+        return self._by_name.get(name)
+
+    def position(self, name):
+        """List position of a user (for list widgets), None if there is none"""
+        user = self._by_name.get(name)
+        return None if user is None else self._users.index(user)
+
+    def add(self, user):
+        self._users.append(user)
+        self._by_name[user.name] = user
+
+    def remove(self, name):
+        self._users = [user for user in self._users if user.name != name]
+        self._by_name.pop(name, None)
+        self._dirty.pop(name, None)
+
+    def mark_dirty(self, name):
+        self._dirty[name] = True
+
+    def take_dirty(self):
+        """{name: column values} of every changed user, clearing their flags"""
+        dirty, self._dirty = self._dirty, {}
+        rows = {}
+        for name in dirty:
+            user = self._by_name.get(name)
+            if user is not None:
+                rows[name] = user.to_row()
+                del rows[name]['name']
+        return rows
@@ -1,6 +1,42 @@
+import time
+# Taken before the other imports, so REWARDS_TIMING=1 reports the whole launch latency
+LAUNCH_TIME = time.perf_counter()
+
+import math
+import os
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
-import pandas as pd
+from ledger import Ledger, KIND_COMPLETE, KIND_REDEEM
+from storage import open_storage, column_names
+from core import User, UserStore, ActivityCatalog, RewardCatalog, AchievementCatalog, users_from_columns
+from persistence import PersistenceWorker
+from ranks import RankEngine
+from leaderboard import Leaderboard, CRITERIA
+from listview import VirtualList, Section
+from cardview import CardList
+from toast import ToastQueue, HIGHLIGHT
+from search import SearchIndex
+from rollups import Rollups, PERIODS
+from streaks import StreakEngine
+from rates import EarningRates
+from scheduler import Scheduler, WEEKDAYS, next_time, daily, weekly
+
+# Milliseconds between periodic autosaves of the current user
+AUTOSAVE_INTERVAL = 60000
+
+# Buckets shown in the stats window per period
+STATS_BUCKETS = {'day': 30, 'week': 52, 'month': 12}
+
+# Achievement card states
+CARD_LOCKED, CARD_ACHIEVED, CARD_CURRENT = 0, 1, 2
+
+# In-memory type of each table, built from its columns
+TABLE_TYPES = {
+    'users': lambda columns: UserStore(users_from_columns(columns)),
+    'activities': ActivityCatalog,
+    'rewards': RewardCatalog,
+    'achievements': AchievementCatalog
+}
 
 class RewardsApp:
     def __init__(self, root):
@@ -40,102 +76,270 @@ class RewardsApp:
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         
         # Load data
+        self.storage = open_storage()
+        self.ledger = Ledger()
+        # Day/week/month history, only the ledger tail after its last save is replayed
+        self.rollups = Rollups()
+        self.rollups.catch_up(self.ledger)
+        self.streaks = StreakEngine()
+        self.streaks.catch_up(self.ledger)
+        # Rolling points/tasks per day for the rank forecasts, seeded from the daily rollups
+        self.rates = EarningRates()
+        self.rates.seed(self.rollups)
+        # All disk writes run on this thread, the Tk loop never waits on them
+        self.worker = PersistenceWorker()
+        # Checkpoint rows taken for the queued users save, kept until they are written
+        self.unsaved_users = {}
+        self.job_counter = 0
+        # Built the first time it is shown, then kept up to date on every event
+        self.leaderboard = None
+        self.current_user = None
+        # Built the first time it is shown, then hidden/shown and re-styled
+        self.achievements_window = None
+        # Days until every rank for the current user, recomputed on each refresh of that window
+        self.rank_days = None
+        # Name search index per list, built on its first search and then kept in sync
+        self.search_indexes = {}
+        # table -> sync() generator of an index still being built/re-synced
+        self.indexing = {}
         self.load_data()
         
         # Initialize current user
-        self.current_user = None
-        self.current_user_index = 0
-        if not self.df_users.empty:
+        if self.users:
             self.load_user(0)
         
         # Create GUI
         self.create_widgets()
         self.update_display()
+        
+        # Midnight reset and activity reminders, woken by root.after only when something is due
+        self.scheduler = Scheduler()
+        self.scheduler.schedule(('daily_reset',), next_time(time.time(), 0, 0), self.daily_reset, daily())
+        self.load_reminders()
+        self.scheduler.attach(self.root)
+        
+        # Persistence callbacks and periodic autosave
+        self.root.after(100, self.poll_persistence)
+        self.root.after(AUTOSAVE_INTERVAL, self.autosave)
     
-    def load_data(self):
-        """Load all CSV data"""
+    def load_data(self, only_changed=False):
+        """Load tables from storage (only the ones modified on disk if only_changed) and return their names"""
+        tables = ['users', 'activities', 'rewards', 'achievements']
+        if only_changed:
+            tables = [table for table in tables if self.storage.changed(table)]
+            if not tables:
+                return set()
+        # Queued writes must land before reading the tables back
+        self.worker.flush()
         try:
-            self.df_users = pd.read_csv('users.csv')
-            self.df_activities = pd.read_csv('activities.csv')
-            self.df_rewards = pd.read_csv('rewards.csv')
-            self.df_achievements = pd.read_csv('achievements.csv')
+            # Compact array-backed catalogs shared with the console
+            for table in tables:
+                setattr(self, table, TABLE_TYPES[table](self.storage.load_columns(table)))
+            if 'achievements' in tables:
+                self.ranks = RankEngine(self.achievements)
+            if {'users', 'achievements'} & set(tables):
+                self.leaderboard = None
         except FileNotFoundError as e:
             messagebox.showerror("Error", f"Required CSV file not found: {e}")
             self.root.destroy()
+        return set(tables)
     
     def reload_data(self):
-        """Reload data from CSV files"""
-        self.load_data()
-        self.populate_activities()
-        self.populate_rewards()
-        self.update_display()
+        """Re-read only the tables changed on disk and refresh only the widgets showing them"""
+        changed = self.load_data(only_changed=True)
+        if 'users' in changed and self.current_user:
+            # Keep working on the same user, now an entry of the reloaded store
+            reloaded = self.users.get(self.current_user.name)
+            self.load_user(self.users.position(reloaded.name) if reloaded else 0)
+        if 'activities' in changed:
+            self.populate_activities()
+        elif 'users' in changed:
+            self.activities_view.redraw()
+        if 'rewards' in changed:
+            self.populate_rewards()
+        if 'achievements' in changed and self.achievements_window is not None:
+            self.achievement_cards.set_cards(self.achievement_states())
+        if changed & {'users', 'achievements'}:
+            self.update_display()
     
     def load_user(self, index):
-        """Load user data from dataframe"""
-        if index < len(self.df_users):
-            row = self.df_users.iloc[index]
-            self.current_user_index = index
-            self.current_user = {
-                'name': row['name'],
-                'total_points': int(row['total_points']),
-                'activities_completed': int(row['activities_completed']),
-                'alltime_points': int(row['alltime_points'])
-            }
+        """Make a store entry the current user, replaying ledger events after its checkpoint"""
+        if index < len(self.users):
+            user = self.users[index]
+            totals = self.ledger.derive_totals(user.to_row())
+            user.total_points = totals['total_points']
+            user.activities_completed = totals['activities_completed']
+            user.alltime_points = totals['alltime_points']
+            # The replayed events are now part of the in-memory checkpoint
+            user.ledger_seq = self.ledger.last_seq
+            self.current_user = user
+    
+    def persist(self, job):
+        """Queue a storage write on the persistence thread, keeping submission order"""
+        self.job_counter += 1
+        
+        def write():
+            job()
+            # CSV rewrites are only queued by the storage, write them here so errors reach the Tk thread
+            self.storage.flush()
+        
+        self.worker.submit(('job', self.job_counter), write, delay=0)
+    
+    def poll_persistence(self):
+        """Run persistence callbacks on the Tk thread"""
+        while not self.worker.completed.empty():
+            callback, error = self.worker.completed.get()
+            if callback is not None:
+                callback(error)
+            else:
+                messagebox.showerror("✗ Save Failed", f"Could not write data:\n{error}")
+        self.root.after(100, self.poll_persistence)
+    
+    def autosave(self):
+        """Periodically checkpoint the current user"""
+        if self.current_user:
+            self.save_user()
+        self.root.after(AUTOSAVE_INTERVAL, self.autosave)
+    
+    def record_event(self, kind, item, delta, item_id):
+        """Record a completion/redemption in the ledger and write it in the background"""
+        event = self.ledger.record(self.current_user.name, kind, item, delta, item_id)
+        self.worker.submit('ledger', self.ledger.flush, delay=0)
+        self.rollups.add(event)
+        self.streaks.add(event)
+        self.rates.add(event)
+        # The current user already holds the new totals, so its checkpoint moves with the event
+        self.current_user.ledger_seq = event[0]
+        self.users.mark_dirty(self.current_user.name)
+        if self.leaderboard is not None:
+            self.leaderboard.update(self.current_user)
+    
+    def save_user(self, callback=None):
+        """Checkpoint the totals of every changed user into storage (events are already in the ledger)"""
+        # Rows are taken here on the Tk thread, where totals and ledger_seq always change together.
+        # A save replacing one still queued also carries that one's rows
+        rows = {**self.unsaved_users, **self.users.take_dirty()}
+        self.unsaved_users = rows
+        
+        def job():
+            # Events folded into the checkpoints must be on disk first
+            self.ledger.flush()
+            self.storage.update_users(rows)
+            self.storage.flush()
+            self.rollups.save()
+            self.streaks.save()
+        
+        def saved(error):
+            latest = self.unsaved_users is rows
+            # After a failed write the rows stay for the next save
+            if latest and error is None:
+                self.unsaved_users = {}
+            if callback is not None:
+                callback(error)
+            elif latest and error is not None:
+                messagebox.showerror("✗ Save Failed", f"Could not write data:\n{error}")
+        
+        # Repeated saves within the debounce delay become one write of the users changed meanwhile
+        self.worker.submit('users', job, saved)
+    
+    def load_reminders(self):
+        """Read the schedules table and put every reminder on the scheduler"""
+        try:
+            columns = self.storage.load_columns('schedules')
+        except FileNotFoundError:
+            columns = {col: [] for col in column_names('schedules')}
+        self.reminders = [dict(zip(columns, values)) for values in zip(*columns.values())]
+        for reminder in self.reminders:
+            self.schedule_reminder(reminder)
     
-    def save_user(self):
-        """Save current user data back to CSV"""
-        mask = self.df_users['name'] == self.current_user['name']
-        self.df_users.loc[mask, 'total_points'] = self.current_user['total_points']
-        self.df_users.loc[mask, 'activities_completed'] = self.current_user['activities_completed']
-        self.df_users.loc[mask, 'alltime_points'] = self.current_user['alltime_points']
-        self.df_users.to_csv('users.csv', index=False)
+    def reminder_key(self, reminder):
+        return ('reminder', reminder['user'], reminder['activity_id'], reminder['weekday'], reminder['at'])
+    
+    def schedule_reminder(self, reminder):
+        hour, minute = map(int, reminder['at'].split(':'))
+        if reminder['weekday'] < 0:
+            repeat = daily(hour, minute)
+        else:
+            repeat = weekly(reminder['weekday'], hour, minute)
+        self.scheduler.schedule(self.reminder_key(reminder), repeat(time.time()), self.remind, repeat)
+    
+    def remind(self, key):
+        """A reminder came due: notify if it is for the current user and the task is not done today"""
+        _, user, activity_id, _, _ = key
+        if not self.current_user or user != self.current_user.name:
+            return
+        position = self.activities.position_of(activity_id)
+        if position is None or self.streaks.done_today(user, activity_id):
+            return
+        self.toasts.show(f"⏰ Time for {self.activities.names[position]}", 'info')
+    
+    def clear_reminders(self, activity_id, user_name=None):
+        """Drop the reminders of an activity (of one user, or of every user) from the scheduler and storage"""
+        # From the end, so the storage positions of the remaining ones stay valid
+        for position in reversed(range(len(self.reminders))):
+            reminder = self.reminders[position]
+            if reminder['activity_id'] == activity_id and user_name in (None, reminder['user']):
+                del self.reminders[position]
+                self.scheduler.cancel(self.reminder_key(reminder))
+                self.persist(lambda position=position: self.storage.delete('schedules', position))
+    
+    def daily_reset(self, key):
+        """Local midnight: daily tasks are not done today any more and missed streaks drop to 0"""
+        self.activities_view.redraw()
+        self.toasts.show("🌅 New day! Daily tasks are open again", 'info')
     
     def add_activity_to_csv(self, activity_name, activity_points, is_daily):
-        """Add new activity to CSV"""
-        df = pd.read_csv('activities.csv')
-        new_activity = pd.DataFrame([[activity_name, activity_points, is_daily]], 
-                                    columns=['activity_name', 'activity_points', 'daily_task'])
-        df = pd.concat([df, new_activity], ignore_index=True)
-        df.to_csv('activities.csv', index=False)
+        """Append new activity to storage and to the in-memory table"""
+        self.activities.append(activity_name, activity_points, is_daily)
+        row = self.activities.row(len(self.activities) - 1)
+        self.persist(lambda: self.storage.insert('activities', row))
     
     def add_reward_to_csv(self, reward_name, reward_price, is_regular):
-        """Add new reward to CSV"""
-        df = pd.read_csv('rewards.csv')
-        new_reward = pd.DataFrame([[reward_name, reward_price, is_regular]], 
-                                  columns=['reward_name', 'reward_price', 'regular_reward'])
-        df = pd.concat([df, new_reward], ignore_index=True)
-        df.to_csv('rewards.csv', index=False)
+        """Append new reward to storage and to the in-memory table"""
+        self.rewards.append(reward_name, reward_price, is_regular)
+        row = self.rewards.row(len(self.rewards) - 1)
+        self.persist(lambda: self.storage.insert('rewards', row))
     
     def add_user_to_csv(self, name):
-        """Add new user to CSV"""
-        df = pd.read_csv('users.csv')
-        new_user = pd.DataFrame([[name, 0, 0, 0]], 
-                               columns=['name', 'total_points', 'activities_completed', 'alltime_points'])
-        df = pd.concat([df, new_user], ignore_index=True)
-        df.to_csv('users.csv', index=False)
+        """Append new user to storage and to the in-memory table"""
+        # Start after the current ledger end so events of a deleted namesake are not replayed
+        user = User(name, ledger_seq=self.ledger.last_seq)
+        row = user.to_row()
+        self.persist(lambda: self.storage.insert('users', row))
+        self.users.add(user)
+        if self.leaderboard is not None:
+            self.leaderboard.update(user)
     
     def delete_user_from_csv(self, user_name):
-        """Delete user from CSV"""
-        self.df_users = self.df_users[self.df_users['name'] != user_name]
-        self.df_users.to_csv('users.csv', index=False)
+        """Delete user from storage"""
+        self.users.remove(user_name)
+        self.persist(lambda: self.storage.delete_user(user_name))
+        if self.leaderboard is not None:
+            self.leaderboard.remove(user_name)
+        # History, streaks and rates go with the user, a new namesake starts from nothing
+        self.rollups.forget(user_name)
+        self.streaks.forget(user_name)
+        self.rates.forget(user_name)
+        self.save_user()
+    
+    def get_leaderboard(self):
+        """Leaderboard of all users, built from one vectorized pass over the ledger when first needed"""
+        if self.leaderboard is None:
+            all_totals = self.ledger.derive_all_totals([user.to_row() for user in self.users])
+            self.leaderboard = Leaderboard(self.ranks)
+            self.leaderboard.load(User(**totals) for totals in all_totals)
+        return self.leaderboard
     
     def define_rank(self):
         """Calculate user's current achievement rank based on alltime_points"""
+        rank = self.current_rank()
+        return rank.name if rank else "Beginner"
+    
+    def current_rank(self):
+        """Rank lookup of the current user (rank, next rank and distance to it)"""
         if not self.current_user:
-            return "Beginner"
-        
-        alltime_pts = self.current_user['alltime_points']
-        tasks = self.current_user['activities_completed']
-        
-        current_rank = self.df_achievements.iloc[0]['achievement_name']
-        
-        for idx, row in self.df_achievements.iterrows():
-            if alltime_pts >= row['points_required'] or tasks >= row['tasks_required']:
-                current_rank = row['achievement_name']
-            else:
-                break
-        
-        return current_rank
+            return None
+        return self.ranks.rank_of(self.current_user)
     
     def create_widgets(self):
         # Header with fancy styling
@@ -272,8 +476,21 @@ class RewardsApp:
                                     borderwidth=0)
         achievements_btn.pack(fill='x', pady=(0, 8))
         
+        # View stats button
+        stats_btn = tk.Button(buttons_frame, text="📊 VIEW STATS", 
+                             command=self.show_stats,
+                             font=('Consolas', 9, 'bold'),
+                             bg=self.accent_blue, fg=self.bg_darker,
+                             activebackground=self.accent_purple,
+                             activeforeground=self.bg_darker,
+                             padx=15, pady=8,
+                             relief='flat',
+                             cursor='hand2',
+                             borderwidth=0)
+        stats_btn.pack(fill='x', pady=(0, 8))
+        
         # Save button with hover effect
-        save_btn = tk.Button(buttons_frame, text="⚡ SAVE PROGRESS", 
+        save_btn = tk.Button(buttons_frame, text="⚡ SAVE PROGRESS [Ctrl+S]", 
                            command=self.handle_save,
                            font=('Consolas', 10, 'bold'),
                            bg=self.accent_green, fg=self.bg_darker,
@@ -339,6 +556,19 @@ class RewardsApp:
                                borderwidth=0)
         del_act_btn.pack(side='left', padx=2)
         
+        remind_act_btn = tk.Button(act_btn_frame, text="⏰ REMIND", 
+                                  command=self.reminder_dialog,
+                                  font=('Consolas', 8, 'bold'),
+                                  bg=self.accent_yellow, fg=self.bg_darker,
+                                  padx=8, pady=5,
+                                  relief='flat',
+                                  cursor='hand2',
+                                  borderwidth=0)
+        remind_act_btn.pack(side='left', padx=2)
+        
+        self.search_vars = {}
+        self.create_search_box(activities_section, 'activities', self.accent_purple)
+        
         # Activities listbox
         act_list_frame = tk.Frame(activities_section, bg=self.bg_card)
         act_list_frame.pack(fill='both', expand=True, padx=15, pady=10)
@@ -348,22 +578,21 @@ class RewardsApp:
                                      activebackground=self.accent_purple)
         act_scrollbar.pack(side='right', fill='y')
         
-        self.activities_listbox = tk.Listbox(act_list_frame, 
-                                            font=('Consolas', 10),
-                                            yscrollcommand=act_scrollbar.set,
-                                            selectmode='single',
-                                            bg=self.bg_darker,
-                                            fg=self.text_primary,
-                                            selectbackground=self.accent_purple,
-                                            selectforeground=self.bg_darker,
-                                            relief='flat',
-                                            bd=0,
-                                            highlightthickness=0,
-                                            activestyle='none')
-        self.activities_listbox.pack(side='left', fill='both', expand=True)
-        act_scrollbar.config(command=self.activities_listbox.yview)
-        
-        complete_btn = tk.Button(activities_section, text=">> EXECUTE ACTIVITY", 
+        # Only the visible rows are materialized, however many activities there are
+        self.activities_view = VirtualList(act_list_frame, self.format_activity, act_scrollbar,
+                                           font=('Consolas', 10),
+                                           selectmode='single',
+                                           bg=self.bg_darker,
+                                           fg=self.text_primary,
+                                           selectbackground=self.accent_purple,
+                                           selectforeground=self.bg_darker,
+                                           relief='flat',
+                                           bd=0,
+                                           highlightthickness=0,
+                                           activestyle='none')
+        self.activities_view.pack(side='left', fill='both', expand=True)
+        
+        complete_btn = tk.Button(activities_section, text=">> EXECUTE ACTIVITY [Enter]", 
                                command=self.complete_activity,
                                font=('Consolas', 10, 'bold'),
                                bg=self.accent_purple, fg=self.bg_darker,
@@ -424,6 +653,13 @@ class RewardsApp:
                                borderwidth=0)
         del_rwd_btn.pack(side='left', padx=2)
         
+        self.create_search_box(rewards_section, 'rewards', self.accent_red)
+        
+        # Next reward of each category, filled in by update_affordable
+        self.affordable_label = tk.Label(rewards_section, font=('Consolas', 9),
+                                         bg=self.bg_card, fg=self.accent_yellow, anchor='w')
+        self.affordable_label.pack(fill='x', padx=15)
+        
         # Rewards listbox
         rwd_list_frame = tk.Frame(rewards_section, bg=self.bg_card)
         rwd_list_frame.pack(fill='both', expand=True, padx=15, pady=10)
@@ -433,22 +669,23 @@ class RewardsApp:
                                      activebackground=self.accent_red)
         rwd_scrollbar.pack(side='right', fill='y')
         
-        self.rewards_listbox = tk.Listbox(rwd_list_frame, 
-                                         font=('Consolas', 10),
-                                         yscrollcommand=rwd_scrollbar.set,
-                                         selectmode='single',
-                                         bg=self.bg_darker,
-                                         fg=self.text_primary,
-                                         selectbackground=self.accent_red,
-                                         selectforeground=self.bg_darker,
-                                         relief='flat',
-                                         bd=0,
-                                         highlightthickness=0,
-                                         activestyle='none')
-        self.rewards_listbox.pack(side='left', fill='both', expand=True)
-        rwd_scrollbar.config(command=self.rewards_listbox.yview)
-        
-        redeem_btn = tk.Button(rewards_section, text=">> CLAIM REWARD", 
+        # Rewards within the current points are highlighted, the others dimmed
+        self.rewards_view = VirtualList(rwd_list_frame, self.format_reward, rwd_scrollbar,
+                                        limit_styles=({'fg': self.accent_green},
+                                                      {'fg': self.text_secondary}),
+                                        font=('Consolas', 10),
+                                        selectmode='single',
+                                        bg=self.bg_darker,
+                                        fg=self.text_primary,
+                                        selectbackground=self.accent_red,
+                                        selectforeground=self.bg_darker,
+                                        relief='flat',
+                                        bd=0,
+                                        highlightthickness=0,
+                                        activestyle='none')
+        self.rewards_view.pack(side='left', fill='both', expand=True)
+        
+        redeem_btn = tk.Button(rewards_section, text=">> CLAIM REWARD [Enter]", 
                              command=self.redeem_reward,
                              font=('Consolas', 10, 'bold'),
                              bg=self.accent_red, fg=self.bg_darker,
@@ -466,154 +703,260 @@ class RewardsApp:
                          bg=self.bg_dark, fg=self.text_secondary)
         footer.pack(side='bottom', pady=(10, 5))
         
+        self.list_views = {'activities': self.activities_view, 'rewards': self.rewards_view}
+        
+        # Results of hot actions, shown without blocking the event loop
+        self.toasts = ToastQueue(self.root, {
+            'info': (self.bg_card, self.text_primary),
+            'success': (self.accent_green, self.bg_darker),
+            'error': (self.accent_red, self.bg_darker),
+            HIGHLIGHT: (self.accent_yellow, self.bg_darker)
+        })
+        
+        # Shortcuts: Enter/double-click acts on the selected item directly, Ctrl+S saves
+        self.activities_view.bind('<Return>', lambda event: self.complete_activity())
+        self.activities_view.bind('<Double-Button-1>', lambda event: self.complete_activity())
+        self.rewards_view.bind('<Return>', lambda event: self.redeem_reward(confirm=False))
+        self.rewards_view.bind('<Double-Button-1>', lambda event: self.redeem_reward(confirm=False))
+        self.root.bind('<Control-s>', lambda event: self.handle_save())
+        
         # Populate listboxes
         self.populate_activities()
         self.populate_rewards()
     
+    def create_search_box(self, parent, table, accent):
+        """Search entry filtering a list as the user types (Escape clears it)"""
+        search_frame = tk.Frame(parent, bg=self.bg_card)
+        search_frame.pack(fill='x', padx=15)
+        
+        search_icon = tk.Label(search_frame, text="🔍", font=('Consolas', 10),
+                               bg=self.bg_card, fg=accent)
+        search_icon.pack(side='left')
+        
+        search_var = tk.StringVar()
+        search_entry = tk.Entry(search_frame, textvariable=search_var,
+                                font=('Consolas', 10),
+                                bg=self.bg_darker, fg=self.text_primary,
+                                insertbackground=accent,
+                                relief='flat')
+        search_entry.pack(side='left', fill='x', expand=True, padx=(5, 0), ipady=3)
+        search_entry.bind('<Escape>', lambda event: search_var.set(''))
+        # Index the names as soon as the box is focused, before the first keystroke
+        search_entry.bind('<FocusIn>', lambda event: self.search_index(table))
+        search_var.trace_add('write', lambda *args: self.apply_search(table))
+        self.search_vars[table] = search_var
+    
+    def search_index(self, table):
+        """Search index over the names of a catalog, started on the first search"""
+        if table not in self.search_indexes:
+            self.search_indexes[table] = SearchIndex()
+            self.sync_search_index(table)
+        return self.search_indexes[table]
+    
+    def sync_search_index(self, table):
+        """Bring a search index in line with its catalog a chunk at a time between Tk events"""
+        steps = self.search_indexes[table].sync(getattr(self, table))
+        # A newer sync (after another reload) supersedes this one
+        self.indexing[table] = steps
+        
+        def step():
+            if self.indexing.get(table) is not steps:
+                return
+            try:
+                next(steps)
+            except StopIteration:
+                del self.indexing[table]
+                # Searches typed meanwhile waited for the complete index
+                self.apply_search(table)
+                return
+            self.root.after(1, step)
+        step()
+    
+    def apply_search(self, table):
+        """Filter a list to the items matching its search box (once its index is complete)"""
+        query = self.search_vars[table].get()
+        if not query.strip():
+            self.list_views[table].set_filter(None)
+        elif table not in self.indexing:
+            self.list_views[table].set_filter(self.search_index(table).search(query))
+    
+    def format_activity(self, activity_id):
+        position = self.activities.position_of(activity_id)
+        text = f"├─ {self.activities.names[position]} [+{self.activities.values[position]} pts]"
+        if self.activities.flags[position] and self.current_user:
+            current, longest = self.streaks.get(self.current_user.name, activity_id)
+            if self.streaks.done_today(self.current_user.name, activity_id):
+                text += "  ✓ today"
+            if longest:
+                text += f"  🔥{current} (best {longest})"
+        return text
+    
+    def format_reward(self, reward_id):
+        position = self.rewards.position_of(reward_id)
+        return f"├─ {self.rewards.names[position]} [{self.rewards.values[position]} pts]"
+    
     def populate_activities(self):
-        """Fill activities listbox sorted by category and points"""
-        self.activities_listbox.delete(0, tk.END)
-        
-        # Separate daily and misc activities
-        daily_arr = []
-        misc_arr = []
-        
-        for idx, row in self.df_activities.iterrows():
-            name = row['activity_name']
-            points = int(row['activity_points'])
-            is_daily = row['daily_task']
-            
-            if is_daily:
-                daily_arr.append((idx, name, points))
-            else:
-                misc_arr.append((idx, name, points))
-        
-        # Sort by points
-        daily_arr_sorted = sorted(daily_arr, key=lambda x: x[2])
-        misc_arr_sorted = sorted(misc_arr, key=lambda x: x[2])
-        
-        # Display daily tasks header
-        if daily_arr_sorted:
-            self.activities_listbox.insert(tk.END, "═══ DAILY TASKS ═══")
-            self.activities_listbox.itemconfig(tk.END, {'bg': self.accent_purple, 'fg': self.bg_darker})
-            
-            for idx, name, points in daily_arr_sorted:
-                self.activities_listbox.insert(tk.END, f"├─ {name} [+{points} pts]")
-        
-        # Display miscellaneous header
-        if misc_arr_sorted:
-            if daily_arr_sorted:
-                self.activities_listbox.insert(tk.END, "")  # Spacer
-            self.activities_listbox.insert(tk.END, "═══ MISCELLANEOUS ═══")
-            self.activities_listbox.itemconfig(tk.END, {'bg': self.accent_blue, 'fg': self.bg_darker})
-            
-            for idx, name, points in misc_arr_sorted:
-                self.activities_listbox.insert(tk.END, f"├─ {name} [+{points} pts]")
+        """Fill activities list sorted by category and points"""
+        # Daily and misc activities, each sorted by points
+        daily_keys, misc_keys = self.activities.section_keys()
+        self.activities_view.set_sections([
+            Section("═══ DAILY TASKS ═══", {'bg': self.accent_purple, 'fg': self.bg_darker}, daily_keys),
+            Section("═══ MISCELLANEOUS ═══", {'bg': self.accent_blue, 'fg': self.bg_darker}, misc_keys)
+        ])
+        if 'activities' in self.search_indexes:
+            self.sync_search_index('activities')
     
     def populate_rewards(self):
-        """Fill rewards listbox sorted by category and price"""
-        self.rewards_listbox.delete(0, tk.END)
-        
-        # Separate regular and long-term rewards
-        regular_arr = []
-        longterm_arr = []
-        
-        for idx, row in self.df_rewards.iterrows():
-            name = row['reward_name']
-            price = int(row['reward_price'])
-            is_regular = row['regular_reward']
-            
-            if is_regular:
-                regular_arr.append((idx, name, price))
+        """Fill rewards list sorted by category and price"""
+        # Regular and long-term rewards, each sorted by price
+        regular_keys, longterm_keys = self.rewards.section_keys()
+        self.rewards_view.set_sections([
+            Section("═══ REGULAR REWARDS ═══", {'bg': self.accent_red, 'fg': self.bg_darker}, regular_keys),
+            Section("═══ LONG-TERM REWARDS ═══", {'bg': self.accent_yellow, 'fg': self.bg_darker}, longterm_keys)
+        ])
+        if 'rewards' in self.search_indexes:
+            self.sync_search_index('rewards')
+        self.update_affordable()
+    
+    def update_affordable(self):
+        """Highlight the rewards the current user can afford and show the next one of each category"""
+        points = self.current_user.total_points if self.current_user else 0
+        self.rewards_view.set_limit(points)
+        goals = []
+        for section_index in range(2):
+            key = self.rewards_view.next_above(section_index, points)
+            if key is not None:
+                name = self.rewards.names[self.rewards.position_of(key[1])]
+                goals.append(f"{key[0] - points} pts until {name}")
+        self.affordable_label.config(text="🎯 " + "  |  ".join(goals) if goals else "✓ All rewards affordable")
+    
+    def list_key(self, catalog, position):
+        """(section index, sort key) of a catalog item in its list, flagged items are in the first section"""
+        return (0 if catalog.flags[position] else 1), (catalog.values[position], catalog.ids[position])
+    
+    def index_list_item(self, table, position):
+        """Bring an added/edited item up to date in the search index and the list filter"""
+        catalog, view = getattr(self, table), self.list_views[table]
+        item_id = catalog.ids[position]
+        index = self.search_indexes.get(table)
+        if index is not None:
+            index.update(item_id, catalog.names[position])
+        if view.filter is not None:
+            if index.matches(item_id, self.search_vars[table].get()):
+                view.filter.add(item_id)
             else:
-                longterm_arr.append((idx, name, price))
-        
-        # Sort by price
-        regular_arr_sorted = sorted(regular_arr, key=lambda x: x[2])
-        longterm_arr_sorted = sorted(longterm_arr, key=lambda x: x[2])
-        
-        # Display regular rewards header
-        if regular_arr_sorted:
-            self.rewards_listbox.insert(tk.END, "═══ REGULAR REWARDS ═══")
-            self.rewards_listbox.itemconfig(tk.END, {'bg': self.accent_red, 'fg': self.bg_darker})
-            
-            for idx, name, price in regular_arr_sorted:
-                self.rewards_listbox.insert(tk.END, f"├─ {name} [{price} pts]")
-        
-        # Display long-term rewards header
-        if longterm_arr_sorted:
-            if regular_arr_sorted:
-                self.rewards_listbox.insert(tk.END, "")  # Spacer
-            self.rewards_listbox.insert(tk.END, "═══ LONG-TERM REWARDS ═══")
-            self.rewards_listbox.itemconfig(tk.END, {'bg': self.accent_yellow, 'fg': self.bg_darker})
-            
-            for idx, name, price in longterm_arr_sorted:
-                self.rewards_listbox.insert(tk.END, f"├─ {name} [{price} pts]")
+                view.filter.discard(item_id)
+    
+    def list_item_added(self, table, position):
+        """Show a new catalog item in its list"""
+        self.index_list_item(table, position)
+        self.list_views[table].insert_key(*self.list_key(getattr(self, table), position))
+    
+    def list_item_changed(self, table, position, old_key):
+        """Apply an edited item to its list: re-format it in place, or move it and keep it selected"""
+        view = self.list_views[table]
+        item_id = old_key[1][1]
+        was_shown = view.filter is None or item_id in view.filter
+        self.index_list_item(table, position)
+        new_key = self.list_key(getattr(self, table), position)
+        if old_key == new_key and was_shown and (view.filter is None or item_id in view.filter):
+            view.refresh_key(*new_key)
+        else:
+            view.remove_key(*old_key)
+            view.insert_key(*new_key)
+            view.select_key(*new_key)
+    
+    def list_item_removed(self, table, key):
+        """Drop a deleted catalog item (by its list key) from its list"""
+        index = self.search_indexes.get(table)
+        if index is not None:
+            index.remove(key[1][1])
+        self.list_views[table].remove_key(*key)
     
     def get_selected_activity_index(self):
-        """Get the actual dataframe index of selected activity"""
-        selection = self.activities_listbox.curselection()
-        if not selection:
-            return None
-        
-        selected_idx = selection[0]
-        selected_text = self.activities_listbox.get(selected_idx)
-        
-        # Skip headers and spacers
-        if "═══" in selected_text or selected_text.strip() == "":
+        """Get the catalog position of selected activity"""
+        # Headers and spacers have no id
+        activity_id = self.activities_view.selected_id()
+        if activity_id is None:
             return None
-        
-        # Extract activity name
-        if "├─" in selected_text:
-            activity_name = selected_text.split("├─")[1].split("[")[0].strip()
-            # Find in dataframe
-            for idx, row in self.df_activities.iterrows():
-                if row['activity_name'] == activity_name:
-                    return idx
-        return None
+        return self.activities.position_of(activity_id)
     
     def get_selected_reward_index(self):
-        """Get the actual dataframe index of selected reward"""
-        selection = self.rewards_listbox.curselection()
-        if not selection:
+        """Get the catalog position of selected reward"""
+        reward_id = self.rewards_view.selected_id()
+        if reward_id is None:
             return None
-        
-        selected_idx = selection[0]
-        selected_text = self.rewards_listbox.get(selected_idx)
-        
-        # Skip headers and spacers
-        if "═══" in selected_text or selected_text.strip() == "":
-            return None
-        
-        # Extract reward name
-        if "├─" in selected_text:
-            reward_name = selected_text.split("├─")[1].split("[")[0].strip()
-            # Find in dataframe
-            for idx, row in self.df_rewards.iterrows():
-                if row['reward_name'] == reward_name:
-                    return idx
-        return None
+        return self.rewards.position_of(reward_id)
     
     def update_display(self):
         """Update user status display"""
         if self.current_user:
-            self.name_label.config(text=f"// {self.current_user['name'].upper()}")
-            self.points_label.config(text=f"{self.current_user['total_points']} ⚡")
-            self.alltime_label.config(text=f"{self.current_user['alltime_points']} ✨")
+            self.name_label.config(text=f"// {self.current_user.name.upper()}")
+            self.points_label.config(text=f"{self.current_user.total_points} ⚡")
+            self.alltime_label.config(text=f"{self.current_user.alltime_points} ✨")
             self.activities_label.config(
-                text=f"├─ Completed: {self.current_user['activities_completed']} tasks")
+                text=f"├─ Completed: {self.current_user.activities_completed} tasks")
             
             # Update rank display
             current_rank = self.define_rank()
             emoji = self.achievement_emojis.get(current_rank, '🎯')
             self.rank_label.config(text=f"{emoji} {current_rank.upper()}")
+            self.update_affordable()
+        
+        if self.achievements_window is not None and self.achievements_window.winfo_viewable():
+            self.refresh_achievements()
+    
+    def achievement_states(self):
+        """Card state of every achievement: the ranks before the current one, the current one, then locked"""
+        rank = self.current_rank()
+        count = len(self.achievements)
+        if rank is None:
+            return bytes(count)
+        return bytes([CARD_ACHIEVED]) * rank.index + bytes([CARD_CURRENT]) + bytes(count - rank.index - 1)
+    
+    def forecast_ranks(self):
+        """Days until every rank for the current user at their rolling earning rates"""
+        if not self.current_user or not len(self.ranks):
+            return None
+        points_rate, tasks_rate = self.rates.rates([self.current_user.name])
+        return self.ranks.forecast([self.current_user.alltime_points],
+                                   [self.current_user.activities_completed],
+                                   points_rate, tasks_rate)[0]
+    
+    def format_eta(self, position):
+        """' · ETA <date>' for a rank not reached yet, '' if reached or out of reach at this pace"""
+        if self.rank_days is None or position >= len(self.rank_days):
+            return ""
+        days = self.rank_days[position]
+        if days <= 0 or days == float('inf'):
+            return ""
+        date = time.strftime('%b %d, %Y', time.localtime(time.time() + days * 86400))
+        return f" · ETA {date} (~{math.ceil(days)}d)"
+    
+    def format_achievement(self, position):
+        """Title and requirements (with the forecast date if locked) of one achievement card"""
+        rank_name = self.achievements.names[position]
+        emoji_char = self.achievement_emojis.get(rank_name, '🎯')
+        return (f"{emoji_char} {rank_name.upper()}",
+                f"└─ Requires: {self.achievements.points_required[position]} pts "
+                f"OR {self.achievements.tasks_required[position]} tasks{self.format_eta(position)}")
     
     def show_achievements(self):
-        """Show achievements window"""
+        """Show achievements window (built once, then only brought up to date)"""
+        if self.achievements_window is None or not self.achievements_window.winfo_exists():
+            self.build_achievements_window()
+        self.refresh_achievements()
+        self.achievements_window.deiconify()
+        self.achievements_window.lift()
+    
+    def build_achievements_window(self):
+        """Create the achievements window; closing it only hides it"""
         achievements_window = tk.Toplevel(self.root)
         achievements_window.title("Achievements")
         achievements_window.geometry("600x700")
         achievements_window.configure(bg=self.bg_dark)
+        achievements_window.protocol("WM_DELETE_WINDOW", achievements_window.withdraw)
+        self.achievements_window = achievements_window
         
         # Header
         header = tk.Label(achievements_window, text="🏆 ACHIEVEMENT RANKS", 
@@ -621,103 +964,166 @@ class RewardsApp:
                          bg=self.bg_darker, fg=self.accent_yellow, pady=20)
         header.pack(fill='x')
         
-        # Current rank info
-        current_rank = self.define_rank()
-        emoji = self.achievement_emojis.get(current_rank, '🎯')
-        
+        # Current rank info, filled in by refresh_achievements
         current_frame = tk.Frame(achievements_window, bg=self.bg_card, relief='flat')
         current_frame.pack(fill='x', padx=20, pady=(10, 20))
         
-        current_label = tk.Label(current_frame, 
-                                text=f"YOUR CURRENT RANK: {emoji} {current_rank.upper()}", 
-                                font=('Consolas', 14, 'bold'),
-                                bg=self.bg_card, fg=self.accent_green, pady=15)
-        current_label.pack()
+        self.achievement_current_label = tk.Label(current_frame,
+                                                  font=('Consolas', 14, 'bold'),
+                                                  bg=self.bg_card, fg=self.accent_green, pady=15)
+        self.achievement_current_label.pack()
         
-        # Progress info
-        progress_text = f"├─ All-time: {self.current_user['alltime_points']} pts  |  Tasks: {self.current_user['activities_completed']} ✓"
-        progress_label = tk.Label(current_frame, text=progress_text,
-                                 font=('Consolas', 10),
-                                 bg=self.bg_card, fg=self.text_secondary, pady=(0, 10))
-        progress_label.pack()
+        self.achievement_progress_label = tk.Label(current_frame,
+                                                   font=('Consolas', 10),
+                                                   bg=self.bg_card, fg=self.text_secondary, pady=(0, 10))
+        self.achievement_progress_label.pack()
         
-        # Direct frame approach - NO CANVAS
+        self.achievement_next_label = tk.Label(current_frame,
+                                               font=('Consolas', 10),
+                                               bg=self.bg_card, fg=self.accent_yellow, pady=(0, 10))
+        self.achievement_next_label.pack()
+        
+        # Close button (packed before the cards so it keeps its place when the window shrinks)
+        close_btn = tk.Button(achievements_window, text=">> CLOSE",
+                            command=achievements_window.withdraw,
+                            font=('Consolas', 10, 'bold'),
+                            bg=self.accent_blue, fg=self.bg_darker,
+                            padx=20, pady=10,
+                            relief='flat',
+                            cursor='hand2')
+        close_btn.pack(side='bottom', pady=15)
+        
+        # Scrollable canvas, only the cards in view are drawn
         achievements_container = tk.Frame(achievements_window, bg=self.bg_card)
         achievements_container.pack(fill='both', expand=True, padx=20, pady=(0, 10))
         
-        # Add all achievements directly
-        for idx in range(len(self.df_achievements)):
-            row = self.df_achievements.iloc[idx]
-            rank_name = str(row['achievement_name']).strip()
-            points_req = int(row['points_required'])
-            tasks_req = int(row['tasks_required'])
-            emoji_char = self.achievement_emojis.get(rank_name, '🎯')
-            
-            # Check if achieved
-            is_achieved = (self.current_user['alltime_points'] >= points_req or 
-                          self.current_user['activities_completed'] >= tasks_req)
-            is_current = (rank_name == current_rank)
-            
-            # Achievement card colors
-            if is_current:
-                card_bg = self.accent_green
-                text_color = self.bg_darker
-            elif is_achieved:
-                card_bg = self.bg_darker
-                text_color = self.accent_green
-            else:
-                card_bg = self.bg_darker
-                text_color = self.text_secondary
-            
-            # Create card - DIRECTLY in container
-            card = tk.Frame(achievements_container, bg=card_bg, relief='solid', bd=1)
-            card.pack(fill='x', padx=10, pady=5, ipady=8)
-            
-            # Rank name with emoji
-            rank_header = tk.Label(card, 
-                                  text=f"{emoji_char} {rank_name.upper()}",
-                                  font=('Consolas', 11, 'bold'),
-                                  bg=card_bg, fg=text_color,
-                                  anchor='w')
-            rank_header.pack(fill='x', padx=12, pady=(6, 3))
-            
-            # Requirements
-            req_text = f"└─ Requires: {points_req} pts OR {tasks_req} tasks"
-            req_label = tk.Label(card, text=req_text,
-                               font=('Consolas', 9),
-                               bg=card_bg, fg=text_color,
-                               anchor='w')
-            req_label.pack(fill='x', padx=12, pady=(0, 3))
+        cards_scrollbar = tk.Scrollbar(achievements_container, bg=self.bg_darker,
+                                       troughcolor=self.bg_darker,
+                                       activebackground=self.accent_yellow)
+        cards_scrollbar.pack(side='right', fill='y')
+        
+        self.achievement_cards = CardList(achievements_container, self.format_achievement, {
+            CARD_LOCKED: (self.bg_darker, self.text_secondary, "🔒 LOCKED"),
+            CARD_ACHIEVED: (self.bg_darker, self.accent_green, "✓ ACHIEVED"),
+            CARD_CURRENT: (self.accent_green, self.bg_darker, ">>> CURRENT RANK <<<")
+        }, cards_scrollbar, bg=self.bg_card, width=540)
+        self.achievement_cards.pack(side='left', fill='both', expand=True)
+        self.achievement_cards.set_cards(self.achievement_states())
+    
+    def refresh_achievements(self):
+        """Update the rank info and forecasts, and re-style only the cards whose state changed"""
+        rank = self.current_rank()
+        self.rank_days = self.forecast_ranks()
+        current_rank = self.define_rank()
+        emoji = self.achievement_emojis.get(current_rank, '🎯')
+        self.achievement_current_label.config(text=f"YOUR CURRENT RANK: {emoji} {current_rank.upper()}")
+        if self.current_user:
+            self.achievement_progress_label.config(
+                text=f"├─ All-time: {self.current_user.alltime_points} pts  |  "
+                     f"Tasks: {self.current_user.activities_completed} ✓")
+        if rank and rank.next_name:
+            self.achievement_next_label.config(
+                text=f"└─ Next: {rank.next_name.upper()} in {rank.points_needed} pts "
+                     f"OR {rank.tasks_needed} tasks{self.format_eta(rank.index + 1)}")
+        else:
+            self.achievement_next_label.config(text="")
+        self.achievement_cards.set_states(self.achievement_states())
+        # The forecasts move with every completion, re-format the cards in view
+        self.achievement_cards.refresh()
+    
+    def show_stats(self):
+        """Show points history of the current user from the day/week/month rollups"""
+        if not self.current_user:
+            return
+        stats_window = tk.Toplevel(self.root)
+        stats_window.title("Stats")
+        stats_window.geometry("700x560")
+        stats_window.configure(bg=self.bg_dark)
+        
+        # Header
+        header = tk.Label(stats_window, text=f"📊 HISTORY // {self.current_user.name.upper()}",
+                         font=('Consolas', 18, 'bold'),
+                         bg=self.bg_darker, fg=self.accent_blue, pady=20)
+        header.pack(fill='x')
+        
+        # Period selector
+        period_var = tk.StringVar(value='day')
+        period_frame = tk.Frame(stats_window, bg=self.bg_dark)
+        period_frame.pack(pady=10)
+        for period in PERIODS:
+            period_btn = tk.Radiobutton(period_frame, text=period.upper(), value=period,
+                                        variable=period_var,
+                                        font=('Consolas', 10, 'bold'),
+                                        bg=self.bg_dark, fg=self.text_primary,
+                                        selectcolor=self.bg_card,
+                                        activebackground=self.bg_dark,
+                                        command=lambda: draw())
+            period_btn.pack(side='left', padx=10)
+        
+        chart = tk.Canvas(stats_window, width=660, height=260, bg=self.bg_darker, highlightthickness=0)
+        chart.pack(padx=20)
+        
+        summary_label = tk.Label(stats_window, font=('Consolas', 10),
+                                 bg=self.bg_dark, fg=self.text_primary, justify='left')
+        summary_label.pack(fill='x', padx=20, pady=10)
+        
+        def draw():
+            period = period_var.get()
+            series = self.rollups.series(self.current_user.name, period, STATS_BUCKETS[period])
+            chart.delete('all')
+            if not series:
+                chart.create_text(330, 130, text="No history yet", font=('Consolas', 12),
+                                  fill=self.text_secondary)
+                summary_label.config(text="")
+                return
             
-            # Status
-            if is_current:
-                status_text = ">>> CURRENT RANK <<<"
-            elif is_achieved:
-                status_text = "✓ ACHIEVED"
-            else:
-                status_text = "🔒 LOCKED"
+            # Earned (green) and spent (red) bars side by side for every bucket
+            height, base = 260, 230
+            top = max(max(bucket.earned, bucket.spent) for _, bucket in series) or 1
+            slot = 640 / STATS_BUCKETS[period]
+            bar = max(1.0, slot / 2 - 1)
+            label_every = max(1, len(series) // 6)
+            for position, (label, bucket) in enumerate(series):
+                x = 10 + position * slot
+                chart.create_rectangle(x, base - bucket.earned * (base - 20) / top, x + bar, base,
+                                       fill=self.accent_green, width=0)
+                chart.create_rectangle(x + bar, base - bucket.spent * (base - 20) / top, x + 2 * bar, base,
+                                       fill=self.accent_red, width=0)
+                if position % label_every == 0:
+                    chart.create_text(x, height - 15, text=label[5:] if period != 'month' else label,
+                                      anchor='w', font=('Consolas', 7), fill=self.text_secondary)
+            chart.create_text(10, 10, text=f"max {top} pts", anchor='nw',
+                              font=('Consolas', 8), fill=self.text_secondary)
             
-            status_label = tk.Label(card, text=status_text,
-                                  font=('Consolas', 8, 'bold'),
-                                  bg=card_bg, fg=text_color,
-                                  anchor='w')
-            status_label.pack(fill='x', padx=12, pady=(0, 6))
+            # Totals and favourite activities over the shown buckets
+            counts = {}
+            for _, bucket in series:
+                for activity, count in bucket.activities.items():
+                    counts[activity] = counts.get(activity, 0) + count
+            favourites = sorted(counts.items(), key=lambda item: item[1], reverse=True)[:3]
+            lines = [f"├─ Earned: {sum(bucket.earned for _, bucket in series)} pts  |  "
+                     f"Spent: {sum(bucket.spent for _, bucket in series)} pts  |  "
+                     f"Tasks: {sum(bucket.tasks for _, bucket in series)} ✓"]
+            lines += [f"├─ {activity}: {count}x" for activity, count in favourites]
+            summary_label.config(text="\n".join(lines))
+        
+        draw()
         
         # Close button
-        close_btn = tk.Button(achievements_window, text=">> CLOSE",
-                            command=achievements_window.destroy,
+        close_btn = tk.Button(stats_window, text=">> CLOSE",
+                            command=stats_window.destroy,
                             font=('Consolas', 10, 'bold'),
                             bg=self.accent_blue, fg=self.bg_darker,
                             padx=20, pady=10,
                             relief='flat',
                             cursor='hand2')
-        close_btn.pack(pady=15)
+        close_btn.pack(pady=10)
     
     def show_user_menu(self):
         """Show user management menu"""
         menu_window = tk.Toplevel(self.root)
         menu_window.title("User Management")
-        menu_window.geometry("400x500")
+        menu_window.geometry("400x720")
         menu_window.configure(bg=self.bg_dark)
         menu_window.transient(self.root)
         menu_window.grab_set()
@@ -748,14 +1154,79 @@ class RewardsApp:
         users_listbox.pack(side='left', fill='both', expand=True)
         scrollbar.config(command=users_listbox.yview)
         
+        # Leaderboard
+        board_frame = tk.Frame(menu_window, bg=self.bg_card)
+        board_frame.pack(fill='x', padx=20, pady=(0, 20))
+        
+        board_header = tk.Frame(board_frame, bg=self.bg_card)
+        board_header.pack(fill='x')
+        
+        tk.Label(board_header, text="🏅 LEADERBOARD", font=('Consolas', 11, 'bold'),
+                bg=self.bg_card, fg=self.accent_yellow, pady=8).pack(side='left', padx=(10, 0))
+        
+        criterion_var = tk.StringVar(value=CRITERIA['alltime_points'])
+        criterion_menu = tk.OptionMenu(board_header, criterion_var, *CRITERIA.values(),
+                                       command=lambda _: fill_leaderboard())
+        criterion_menu.config(font=('Consolas', 9), bg=self.bg_darker, fg=self.text_primary,
+                              activebackground=self.accent_yellow, relief='flat',
+                              highlightthickness=0, cursor='hand2')
+        criterion_menu.pack(side='right', padx=10)
+        
+        board_listbox = tk.Listbox(board_frame,
+                                   font=('Consolas', 10),
+                                   height=5,
+                                   bg=self.bg_darker,
+                                   fg=self.text_primary,
+                                   selectbackground=self.accent_yellow,
+                                   selectforeground=self.bg_darker,
+                                   relief='flat',
+                                   bd=0,
+                                   highlightthickness=0,
+                                   activestyle='none')
+        board_listbox.pack(fill='x', padx=10)
+        
+        my_position_label = tk.Label(board_frame, text="", font=('Consolas', 9),
+                                     bg=self.bg_card, fg=self.text_secondary, pady=6)
+        my_position_label.pack(fill='x')
+        
+        def score_text(criterion, score):
+            if criterion == 'rank':
+                name = self.ranks.names[score] if len(self.ranks) else "Beginner"
+                return f"{self.achievement_emojis.get(name, '🎯')} {name}"
+            return str(score)
+        
+        def fill_leaderboard():
+            criterion = next(key for key, label in CRITERIA.items() if label == criterion_var.get())
+            board = self.get_leaderboard()
+            board_listbox.delete(0, tk.END)
+            for place, (name, score) in enumerate(board.top(criterion, 5), start=1):
+                board_listbox.insert(tk.END, f"#{place} {name} ─ {score_text(criterion, score)}")
+            if self.current_user:
+                position = board.position(criterion, self.current_user.name)
+                if position is not None:
+                    my_position_label.config(text=f"└─ You: #{position} of {len(board)}")
+        
+        def fill_users():
+            # Totals and ranks come from the incrementally maintained leaderboard
+            users_listbox.delete(0, tk.END)
+            board = self.get_leaderboard()
+            for user in self.users:
+                scores = board.scores.get(user.name)
+                if scores is None:
+                    users_listbox.insert(tk.END, f"├─ {user.name} ({user.alltime_points} all-time pts)")
+                    continue
+                rank = self.ranks.names[scores['rank']] if len(self.ranks) else "Beginner"
+                users_listbox.insert(tk.END, f"├─ {user.name} ({scores['alltime_points']} all-time pts) "
+                                             f"{self.achievement_emojis.get(rank, '🎯')}")
+            fill_leaderboard()
+        
         # Populate users
         self.reload_data()
-        for idx, row in self.df_users.iterrows():
-            users_listbox.insert(tk.END, f"├─ {row['name']} ({row['alltime_points']} all-time pts)")
+        fill_users()
         
         # Select current user
-        if self.current_user_index < users_listbox.size():
-            users_listbox.selection_set(self.current_user_index)
+        if self.current_user:
+            users_listbox.selection_set(self.users.position(self.current_user.name))
         
         # Buttons frame
         btn_frame = tk.Frame(menu_window, bg=self.bg_dark)
@@ -764,19 +1235,18 @@ class RewardsApp:
         def select_user():
             selection = users_listbox.curselection()
             if selection:
-                self.save_user()
+                # No save needed: every action is already durable in the ledger
                 self.load_user(selection[0])
                 self.update_display()
+                # Streaks shown next to the daily tasks are per user
+                self.activities_view.redraw()
                 menu_window.destroy()
         
         def add_user():
             name = simpledialog.askstring("Add User", "Enter user name:", parent=menu_window)
             if name:
                 self.add_user_to_csv(name)
-                self.reload_data()
-                users_listbox.delete(0, tk.END)
-                for idx, row in self.df_users.iterrows():
-                    users_listbox.insert(tk.END, f"├─ {row['name']} ({row['alltime_points']} all-time pts)")
+                fill_users()
                 messagebox.showinfo("Success", f"User '{name}' added!", parent=menu_window)
         
         def delete_user():
@@ -785,9 +1255,9 @@ class RewardsApp:
                 messagebox.showwarning("No Selection", "Please select a user to delete!", parent=menu_window)
                 return
             
-            user_name = self.df_users.iloc[selection[0]]['name']
+            user_name = self.users[selection[0]].name
             
-            if len(self.df_users) <= 1:
+            if len(self.users) <= 1:
                 messagebox.showerror("Error", "Cannot delete the last user!", parent=menu_window)
                 return
             
@@ -797,13 +1267,12 @@ class RewardsApp:
             if confirm:
                 self.delete_user_from_csv(user_name)
                 self.reload_data()
-                users_listbox.delete(0, tk.END)
-                for idx, row in self.df_users.iterrows():
-                    users_listbox.insert(tk.END, f"├─ {row['name']} ({row['alltime_points']} all-time pts)")
+                fill_users()
                 
-                if self.current_user['name'] == user_name:
+                if self.current_user.name == user_name:
                     self.load_user(0)
                     self.update_display()
+                    self.activities_view.redraw()
                 
                 messagebox.showinfo("Deleted", f"User '{user_name}' deleted!", parent=menu_window)
         
@@ -899,7 +1368,7 @@ class RewardsApp:
                 return
             
             self.add_activity_to_csv(name, points, is_daily_var.get())
-            self.reload_data()
+            self.list_item_added('activities', len(self.activities) - 1)
             messagebox.showinfo("Success", f"Activity '{name}' added!", parent=dialog)
             dialog.destroy()
         
@@ -912,6 +1381,100 @@ class RewardsApp:
                               cursor='hand2')
         submit_btn.pack(fill='x')
     
+    def reminder_dialog(self):
+        """Show dialog to set or clear the reminders of the selected activity"""
+        idx = self.get_selected_activity_index()
+        if idx is None:
+            messagebox.showwarning("No Selection", "Please select an activity to be reminded of!")
+            return
+        if not self.current_user:
+            return
+        activity_id = self.activities.ids[idx]
+        activity_name = self.activities.names[idx]
+        user_name = self.current_user.name
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Reminders")
+        dialog.geometry("450x400")
+        dialog.configure(bg=self.bg_dark)
+        dialog.transient(self.root)
+        dialog.grab_set()
+        
+        # Header
+        header = tk.Label(dialog, text="⏰ REMINDERS", 
+                         font=('Consolas', 14, 'bold'),
+                         bg=self.bg_darker, fg=self.accent_yellow, pady=15)
+        header.pack(fill='x')
+        
+        # Content
+        content = tk.Frame(dialog, bg=self.bg_dark)
+        content.pack(fill='both', expand=True, padx=30, pady=20)
+        
+        mine = [reminder for reminder in self.reminders
+                if reminder['user'] == user_name and reminder['activity_id'] == activity_id]
+        current_text = "\n".join(
+            f"├─ {'Every day' if reminder['weekday'] < 0 else WEEKDAYS[reminder['weekday']]} at {reminder['at']}"
+            for reminder in mine) or "└─ No reminders yet"
+        tk.Label(content, text=f"{activity_name}\n{current_text}", font=('Consolas', 10),
+                bg=self.bg_dark, fg=self.text_primary, justify='left').pack(anchor='w', pady=(0, 15))
+        
+        tk.Label(content, text="Repeat:", font=('Consolas', 10),
+                bg=self.bg_dark, fg=self.text_primary).pack(anchor='w', pady=(0, 5))
+        day_choices = ['Every day'] + list(WEEKDAYS)
+        day_var = tk.StringVar(value=day_choices[0])
+        day_menu = tk.OptionMenu(content, day_var, *day_choices)
+        day_menu.config(font=('Consolas', 10), bg=self.bg_card, fg=self.text_primary,
+                        activebackground=self.bg_card, relief='flat', highlightthickness=0)
+        day_menu.pack(fill='x', pady=(0, 15))
+        
+        tk.Label(content, text="Time (HH:MM):", font=('Consolas', 10),
+                bg=self.bg_dark, fg=self.text_primary).pack(anchor='w', pady=(0, 5))
+        time_entry = tk.Entry(content, font=('Consolas', 11),
+                             bg=self.bg_card, fg=self.text_primary,
+                             insertbackground=self.text_primary,
+                             relief='flat', bd=5)
+        time_entry.insert(0, "09:00")
+        time_entry.pack(fill='x', pady=(0, 20))
+        
+        def submit():
+            try:
+                at = time.strftime('%H:%M', time.strptime(time_entry.get().strip(), '%H:%M'))
+            except ValueError:
+                messagebox.showerror("Invalid Time", "Time must be HH:MM!", parent=dialog)
+                return
+            reminder = {'user': user_name, 'activity_id': activity_id,
+                        'weekday': day_choices.index(day_var.get()) - 1, 'at': at}
+            self.reminders.append(reminder)
+            self.persist(lambda: self.storage.insert('schedules', reminder))
+            self.schedule_reminder(reminder)
+            self.toasts.show(f"⏰ Reminder set: {activity_name}", 'info')
+            dialog.destroy()
+        
+        def clear():
+            self.clear_reminders(activity_id, user_name)
+            dialog.destroy()
+        
+        buttons = tk.Frame(content, bg=self.bg_dark)
+        buttons.pack(fill='x')
+        
+        submit_btn = tk.Button(buttons, text=">> SET REMINDER",
+                              command=submit,
+                              font=('Consolas', 10, 'bold'),
+                              bg=self.accent_yellow, fg=self.bg_darker,
+                              padx=20, pady=10,
+                              relief='flat',
+                              cursor='hand2')
+        submit_btn.pack(side='left', fill='x', expand=True, padx=(0, 5))
+        
+        clear_btn = tk.Button(buttons, text="✗ CLEAR",
+                             command=clear,
+                             font=('Consolas', 10, 'bold'),
+                             bg=self.accent_red, fg=self.bg_darker,
+                             padx=20, pady=10,
+                             relief='flat',
+                             cursor='hand2')
+        clear_btn.pack(side='left', padx=(5, 0))
+    
     def add_reward_dialog(self):
         """Show dialog to add new reward"""
         dialog = tk.Toplevel(self.root)
@@ -977,7 +1540,8 @@ class RewardsApp:
                 return
             
             self.add_reward_to_csv(name, price, is_regular_var.get())
-            self.reload_data()
+            self.list_item_added('rewards', len(self.rewards) - 1)
+            self.update_affordable()
             messagebox.showinfo("Success", f"Reward '{name}' added!", parent=dialog)
             dialog.destroy()
         
@@ -997,7 +1561,7 @@ class RewardsApp:
             messagebox.showwarning("No Selection", "Please select an activity to edit!")
             return
         
-        old_activity = self.df_activities.iloc[idx]
+        old_activity = self.activities[idx]
         
         dialog = tk.Toplevel(self.root)
         dialog.title("Edit Activity")
@@ -1022,7 +1586,7 @@ class RewardsApp:
                              bg=self.bg_card, fg=self.text_primary,
                              insertbackground=self.text_primary,
                              relief='flat', bd=5)
-        name_entry.insert(0, old_activity['activity_name'])
+        name_entry.insert(0, old_activity.name)
         name_entry.pack(fill='x', pady=(0, 15))
         
         tk.Label(content, text="Points:", font=('Consolas', 10),
@@ -1031,11 +1595,11 @@ class RewardsApp:
                                bg=self.bg_card, fg=self.text_primary,
                                insertbackground=self.text_primary,
                                relief='flat', bd=5)
-        points_entry.insert(0, str(old_activity['activity_points']))
+        points_entry.insert(0, str(old_activity.points))
         points_entry.pack(fill='x', pady=(0, 15))
         
         # Daily task checkbox
-        is_daily_var = tk.BooleanVar(value=bool(old_activity['daily_task']))
+        is_daily_var = tk.BooleanVar(value=bool(old_activity.daily))
         daily_check = tk.Checkbutton(content, text="Daily Task", 
                                      variable=is_daily_var,
                                      font=('Consolas', 10, 'bold'),
@@ -1064,11 +1628,11 @@ class RewardsApp:
                 return
             
             # Update the activity
-            self.df_activities.at[idx, 'activity_name'] = name
-            self.df_activities.at[idx, 'activity_points'] = points
-            self.df_activities.at[idx, 'daily_task'] = is_daily_var.get()
-            self.df_activities.to_csv('activities.csv', index=False)
-            self.reload_data()
+            old_key = self.list_key(self.activities, idx)
+            self.activities.update(idx, name, points, is_daily_var.get())
+            row = self.activities.row(idx)
+            self.persist(lambda: self.storage.update('activities', idx, row))
+            self.list_item_changed('activities', idx, old_key)
             messagebox.showinfo("Success", f"Activity updated!", parent=dialog)
             dialog.destroy()
         
@@ -1088,7 +1652,7 @@ class RewardsApp:
             messagebox.showwarning("No Selection", "Please select a reward to edit!")
             return
         
-        old_reward = self.df_rewards.iloc[idx]
+        old_reward = self.rewards[idx]
         
         dialog = tk.Toplevel(self.root)
         dialog.title("Edit Reward")
@@ -1113,7 +1677,7 @@ class RewardsApp:
                              bg=self.bg_card, fg=self.text_primary,
                              insertbackground=self.text_primary,
                              relief='flat', bd=5)
-        name_entry.insert(0, old_reward['reward_name'])
+        name_entry.insert(0, old_reward.name)
         name_entry.pack(fill='x', pady=(0, 15))
         
         tk.Label(content, text="Price (points):", font=('Consolas', 10),
@@ -1122,11 +1686,11 @@ class RewardsApp:
                               bg=self.bg_card, fg=self.text_primary,
                               insertbackground=self.text_primary,
                               relief='flat', bd=5)
-        price_entry.insert(0, str(old_reward['reward_price']))
+        price_entry.insert(0, str(old_reward.price))
         price_entry.pack(fill='x', pady=(0, 15))
         
         # Regular reward checkbox
-        is_regular_var = tk.BooleanVar(value=bool(old_reward['regular_reward']))
+        is_regular_var = tk.BooleanVar(value=bool(old_reward.regular))
         regular_check = tk.Checkbutton(content, text="Regular Reward", 
                                       variable=is_regular_var,
                                       font=('Consolas', 10, 'bold'),
@@ -1155,11 +1719,12 @@ class RewardsApp:
                 return
             
             # Update the reward
-            self.df_rewards.at[idx, 'reward_name'] = name
-            self.df_rewards.at[idx, 'reward_price'] = price
-            self.df_rewards.at[idx, 'regular_reward'] = is_regular_var.get()
-            self.df_rewards.to_csv('rewards.csv', index=False)
-            self.reload_data()
+            old_key = self.list_key(self.rewards, idx)
+            self.rewards.update(idx, name, price, is_regular_var.get())
+            row = self.rewards.row(idx)
+            self.persist(lambda: self.storage.update('rewards', idx, row))
+            self.list_item_changed('rewards', idx, old_key)
+            self.update_affordable()
             messagebox.showinfo("Success", f"Reward updated!", parent=dialog)
             dialog.destroy()
         
@@ -1179,17 +1744,19 @@ class RewardsApp:
             messagebox.showwarning("No Selection", "Please select an activity to delete!")
             return
         
-        activity = self.df_activities.iloc[idx]
+        activity = self.activities[idx]
         
         confirm = messagebox.askyesno("Confirm Delete",
-                                     f"Delete activity '{activity['activity_name']}'?\n"
+                                     f"Delete activity '{activity.name}'?\n"
                                      f"This cannot be undone!")
         
         if confirm:
-            self.df_activities = self.df_activities.drop(self.df_activities.index[idx])
-            self.df_activities.to_csv('activities.csv', index=False)
-            self.reload_data()
-            messagebox.showinfo("Deleted", f"Activity '{activity['activity_name']}' deleted!")
+            key = self.list_key(self.activities, idx)
+            del self.activities[idx]
+            self.persist(lambda: self.storage.delete('activities', idx))
+            self.list_item_removed('activities', key)
+            self.clear_reminders(activity.id)
+            messagebox.showinfo("Deleted", f"Activity '{activity.name}' deleted!")
     
     def delete_reward(self):
         """Delete selected reward"""
@@ -1198,94 +1765,115 @@ class RewardsApp:
             messagebox.showwarning("No Selection", "Please select a reward to delete!")
             return
         
-        reward = self.df_rewards.iloc[idx]
+        reward = self.rewards[idx]
         
         confirm = messagebox.askyesno("Confirm Delete",
-                                     f"Delete reward '{reward['reward_name']}'?\n"
+                                     f"Delete reward '{reward.name}'?\n"
                                      f"This cannot be undone!")
         
         if confirm:
-            self.df_rewards = self.df_rewards.drop(self.df_rewards.index[idx])
-            self.df_rewards.to_csv('rewards.csv', index=False)
-            self.reload_data()
-            messagebox.showinfo("Deleted", f"Reward '{reward['reward_name']}' deleted!")
+            key = self.list_key(self.rewards, idx)
+            del self.rewards[idx]
+            self.persist(lambda: self.storage.delete('rewards', idx))
+            self.list_item_removed('rewards', key)
+            self.update_affordable()
+            messagebox.showinfo("Deleted", f"Reward '{reward.name}' deleted!")
     
     def complete_activity(self):
         """Handle activity completion"""
         idx = self.get_selected_activity_index()
         if idx is None:
-            messagebox.showwarning("⚠ No Selection", "Please select an activity to complete!")
+            self.toasts.show("⚠ Select an activity to complete", 'error')
             return
         
-        activity = self.df_activities.iloc[idx]
+        activity = self.activities[idx]
         old_rank = self.define_rank()
         
-        self.current_user['total_points'] += int(activity['activity_points'])
-        self.current_user['alltime_points'] += int(activity['activity_points'])
-        self.current_user['activities_completed'] += 1
+        self.current_user.complete(activity.points)
+        self.record_event(KIND_COMPLETE, activity.name, activity.points, activity.id)
+        if activity.daily:
+            # New streak next to the task
+            self.activities_view.refresh_key(*self.list_key(self.activities, idx))
         
         new_rank = self.define_rank()
         
         self.update_display()
         
+        self.toasts.show(f"✓ {activity.name}  +{activity.points} pts  "
+                         f"(total {self.current_user.total_points})", 'success')
         # Check for rank up
         if old_rank != new_rank:
             emoji = self.achievement_emojis.get(new_rank, '🎯')
-            messagebox.showinfo("🎉 RANK UP!", 
-                f"Congratulations!\n\n"
-                f"{emoji} You've achieved: {new_rank.upper()}!\n\n"
-                f"Activity '{activity['activity_name']}' completed!\n"
-                f">> Earned: +{activity['activity_points']} points\n"
-                f">> Total: {self.current_user['total_points']} points")
-        else:
-            messagebox.showinfo("✓ Success", 
-                f"Activity '{activity['activity_name']}' completed!\n\n"
-                f">> Earned: +{activity['activity_points']} points\n"
-                f">> Total: {self.current_user['total_points']} points")
+            self.toasts.show(f"🎉 RANK UP! {emoji} {new_rank.upper()}", HIGHLIGHT)
     
-    def redeem_reward(self):
-        """Handle reward redemption"""
+    def redeem_reward(self, confirm=True):
+        """Handle reward redemption (shortcuts skip the confirmation)"""
         idx = self.get_selected_reward_index()
         if idx is None:
-            messagebox.showwarning("⚠ No Selection", "Please select a reward to redeem!")
+            self.toasts.show("⚠ Select a reward to redeem", 'error')
             return
         
-        reward = self.df_rewards.iloc[idx]
+        reward = self.rewards[idx]
         
-        if self.current_user['total_points'] < int(reward['reward_price']):
-            messagebox.showerror("✗ Insufficient Points", 
-                f"Required: {reward['reward_price']} points\n"
-                f"Available: {self.current_user['total_points']} points\n\n"
-                f"Need {int(reward['reward_price']) - self.current_user['total_points']} more points!")
+        if not self.current_user.can_afford(reward.price):
+            self.toasts.show(f"✗ {reward.name}: need {reward.price - self.current_user.total_points} "
+                             f"more points", 'error')
             return
         
-        confirm = messagebox.askyesno("⚡ Confirm Redemption", 
-            f"Redeem: {reward['reward_name']}\n"
-            f"Cost: {reward['reward_price']} points\n\n"
-            f"Confirm purchase?")
+        if confirm and not messagebox.askyesno("⚡ Confirm Redemption", 
+                f"Redeem: {reward.name}\n"
+                f"Cost: {reward.price} points\n\n"
+                f"Confirm purchase?"):
+            return
         
-        if confirm:
-            self.current_user['total_points'] -= int(reward['reward_price'])
-            self.update_display()
-            messagebox.showinfo("✓ Redeemed!", 
-                f"Reward '{reward['reward_name']}' claimed!\n\n"
-                f">> Spent: -{reward['reward_price']} points\n"
-                f">> Remaining: {self.current_user['total_points']} points")
+        self.current_user.redeem(reward.price)
+        self.record_event(KIND_REDEEM, reward.name, -reward.price, reward.id)
+        self.update_display()
+        self.toasts.show(f"✓ {reward.name}  -{reward.price} pts  "
+                         f"(remaining {self.current_user.total_points})", 'success')
     
     def handle_save(self):
-        """Save user progress"""
-        self.save_user()
-        messagebox.showinfo("✓ Saved", "Progress saved to database!\n\n>> Data synchronized successfully")
+        """Save user progress in the background and confirm once it is on disk"""
+        def done(error):
+            if error is None:
+                self.toasts.show("✓ Progress saved", 'info')
+            else:
+                self.toasts.show(f"✗ Save failed: {error}", 'error')
+        self.save_user(callback=done)
     
     def on_closing(self):
-        """Handle window close event with auto-save"""
+        """Handle window close event with auto-save, reporting anything that could not be written"""
+        errors = []
+        self.save_user(callback=lambda error: error is not None and errors.append(str(error)))
+        # Write everything still queued before leaving
+        self.worker.flush()
+        while not self.worker.completed.empty():
+            callback, error = self.worker.completed.get()
+            if callback is not None:
+                callback(error)
+            elif error is not None:
+                errors.append(str(error))
         try:
-            self.save_user()
-            self.root.destroy()
-        except:
-            self.root.destroy()
+            # Also retries tables a failed job left unwritten
+            self.storage.close()
+        except Exception as e:
+            errors.append(str(e))
+        if errors:
+            messagebox.showerror("✗ Save Failed",
+                                 "Some changes could not be written:\n" + "\n".join(dict.fromkeys(errors)))
+        self.root.destroy()
+
+def report_startup(root):
+    """Print the time from launch until the main window is first mapped"""
+    def on_map(event):
+        if event.widget is root:
+            root.unbind('<Map>')
+            print(f"Window visible after {(time.perf_counter() - LAUNCH_TIME) * 1000:.0f} ms")
+    root.bind('<Map>', on_map)
 
 if __name__ == "__main__":
     root = tk.Tk()
+    if os.environ.get('REWARDS_TIMING'):
+        report_startup(root)
     app = RewardsApp(root)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,76 @@
+# Leaderboard shared by the GUI and the Console version
+# Every criterion keeps one list of (-score, name) sorted with bisect. A completion/redemption
+# only moves that user on each list, so top-k is a slice and "my position" is one bisect
+# instead of re-sorting all users.
+
+from bisect import bisect_left, insort
+
+CRITERIA = {
+    'alltime_points': 'All-time points',
+    'total_points': 'Current points',
+    'activities_completed': 'Tasks completed',
+    'rank': 'Rank'
+}
+
+
+class Leaderboard:
+    def __init__(self, ranks):
+        self.ranks = ranks
+        # name -> {criterion: score}
+        self.scores = {}
+        self.boards = {criterion: [] for criterion in CRITERIA}
+
+    def load(self, users):
+        """Build every board at once from User objects (ranks resolved in one vectorized pass)"""
+        users = list(users)
+        ranks = self.ranks.rank_all({
+            'alltime_points': [user.alltime_points for user in users],
+            'activities_completed': [user.activities_completed for user in users]
+        })
+        self.scores = {}
+        for position, user in enumerate(users):
+            self.scores[user.name] = self._scores(user, int(ranks['rank'][position]) if ranks else 0)
+        for criterion, board in self.boards.items():
+            board[:] = sorted((-scores[criterion], name) for name, scores in self.scores.items())
+
+    def _scores(self, user, rank):
+        return {
+            'alltime_points': user.alltime_points,
+            'total_points': user.total_points,
+            'activities_completed': user.activities_completed,
+            'rank': rank
+        }
+
+    def update(self, user):
+        """Move one user on every board after its totals changed (adds a new user)"""
+        rank = self.ranks.rank_of(user)
+        scores = self._scores(user, rank.index if rank else 0)
+        old = self.scores.get(user.name, {})
+        for criterion, board in self.boards.items():
+            if old.get(criterion) == scores[criterion]:
+                continue
+            if criterion in old:
+                del board[bisect_left(board, (-old[criterion], user.name))]
+            insort(board, (-scores[criterion], user.name))
+        self.scores[user.name] = scores
+
+    def remove(self, name):
+        scores = self.scores.pop(name, None)
+        if scores is None:
+            return
+        for criterion, board in self.boards.items():
+            del board[bisect_left(board, (-scores[criterion], name))]
+
+    def __len__(self):
+        return len(self.scores)
+
+    def top(self, criterion, k=10):
+        """Best k users as (name, score)"""
+        return [(name, -score) for score, name in self.boards[criterion][:k]]
+
+    def position(self, criterion, name):
+        """1-based place of a user, ties share the best place (None for an unknown user)"""
+        scores = self.scores.get(name)
+        if scores is None:
+            return None
+        return bisect_left(self.boards[criterion], (-scores[criterion],)) + 1
@@ -0,0 +1,326 @@
+# Append-only event ledger shared by the GUI and the Console version
+# Every completed activity / redeemed reward is one fixed-width binary record in ledger.bin,
+# users.csv only keeps a checkpoint of the totals (ledger_seq = number of records folded in).
+# The file is read through mmap: replaying a checkpoint only unpacks the records after it, the
+# analytics view it as a NumPy structured array without copying it, and readers work on a
+# snapshot of the written records, so they never wait for a flush (and its fsync) in progress.
+# Users, activities and rewards are stored as small integer ids, the id <-> name mapping
+# is appended to ledger_names.csv the first time a name shows up. Activities and rewards are
+# interned by (stable catalog id, name), so events keep the catalog id of their item through
+# renames and duplicate names.
+
+import csv
+import io
+import mmap
+import os
+import struct
+import threading
+import time
+
+from storage import atomic_write
+
+LEDGER_FILE = 'ledger.bin'
+NAMES_FILE = 'ledger_names.csv'
+
+MAGIC = b'RWLEDG01'
+HEADER = struct.Struct('<8sII')      # magic, record size, reserved -> 16 bytes
+RECORD = struct.Struct('<qiiiB3x')   # timestamp, user id, item id, delta, kind -> 24 bytes
+
+KIND_COMPLETE = 'complete'
+KIND_REDEEM = 'redeem'
+KIND_CODES = {KIND_COMPLETE: 1, KIND_REDEEM: 2}
+KIND_NAMES = {code: kind for kind, code in KIND_CODES.items()}
+# Activities and rewards have separate id spaces
+ITEM_SPACES = {KIND_COMPLETE: 'activity', KIND_REDEEM: 'reward'}
+NAMES_COLUMNS = ['space', 'id', 'name', 'item_id']
+
+
+def record_dtype():
+    """NumPy structured dtype matching RECORD"""
+    import numpy as np
+    return np.dtype({
+        'names': ['timestamp', 'user', 'item', 'delta', 'kind'],
+        'formats': ['<i8', '<i4', '<i4', '<i4', 'u1'],
+        'offsets': [0, 8, 12, 16, 20],
+        'itemsize': RECORD.size
+    })
+
+
+def append_durably(path, data):
+    """Append bytes and fsync; on failure the file is cut back, so a retry never follows a partial write"""
+    with open(path, 'ab', buffering=0) as f:
+        size = os.fstat(f.fileno()).st_size
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[f.write(view):]
+            os.fsync(f.fileno())
+        except OSError:
+            os.ftruncate(f.fileno(), size)
+            raise
+
+
+def local_day(timestamp):
+    """Local calendar day of a timestamp, as days since 1970-01-01
+
+    Uses the UTC offset in effect at that timestamp, so an event replayed across a DST change
+    still lands on the day it happened.
+    """
+    return (timestamp + time.localtime(timestamp).tm_gmtoff) // 86400
+
+
+class Ledger:
+    def __init__(self, path=LEDGER_FILE, names_path=NAMES_FILE):
+        self.path = path
+        self.names_path = names_path
+        # Interning key -> id for each id space (the name for users, (catalog id, name) for items),
+        # and id -> name / catalog id (0 for users and items recorded without one)
+        self.ids = {'user': {}, 'activity': {}, 'reward': {}}
+        self.names = {'user': [], 'activity': [], 'reward': []}
+        self.item_ids = {'user': [], 'activity': [], 'reward': []}
+        # Number of records on disk, and the seq of the newest (possibly not yet written) event
+        self.written = 0
+        self.last_seq = 0
+        # Recorded but not yet written events / names (the GUI writes them from its persistence thread)
+        self._unwritten = []
+        self._new_names = []
+        self._map = None
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+
+        self._load_names()
+        self._open()
+
+    # ---------------File_Managment---------------
+    def _load_names(self):
+        rows = []
+        try:
+            with open(self.names_path, newline='', encoding='utf-8') as f:
+                reader = csv.DictReader(f)
+                for row in reader:
+                    space, name, item_id = row['space'], row['name'], int(row.get('item_id') or 0)
+                    self.ids[space][name if space == 'user' else (item_id, name)] = int(row['id'])
+                    self.names[space].append(name)
+                    self.item_ids[space].append(item_id)
+                    rows.append((space, row['id'], name, item_id))
+        except FileNotFoundError:
+            return
+        if reader.fieldnames != NAMES_COLUMNS:
+            # Older file without the catalog ids: rewrite the header so appended rows line up with it
+            atomic_write(self.names_path, NAMES_COLUMNS, rows)
+
+    def _open(self):
+        """Create or validate the file and drop a torn last record left by a crash"""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < HEADER.size:
+            with open(self.path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, RECORD.size, 0))
+                f.flush()
+                os.fsync(f.fileno())
+        with open(self.path, 'rb+') as f:
+            magic, record_size, _ = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or record_size != RECORD.size:
+                raise ValueError(f'{self.path} is not a ledger file')
+            size = os.fstat(f.fileno()).st_size
+            self.written = (size - HEADER.size) // RECORD.size
+            if HEADER.size + self.written * RECORD.size != size:
+                f.truncate(HEADER.size + self.written * RECORD.size)
+        self.last_seq = self.written + len(self._unwritten)
+
+    def _snapshot(self):
+        """(read-only mmap or None, records in it, events not written yet), consistent together
+
+        The mmap covers exactly the records written when it was mapped and is replaced, not
+        closed, when the file grows: a reader still using an older one sees its own snapshot.
+        """
+        with self._lock:
+            written = self.written
+            if self._map is None and written:
+                with open(self.path, 'rb') as f:
+                    self._map = mmap.mmap(f.fileno(), HEADER.size + written * RECORD.size,
+                                          access=mmap.ACCESS_READ)
+            return self._map, written, [event for event, _ in self._unwritten]
+
+    @staticmethod
+    def _view(buffer, written):
+        """NumPy structured array over the records of a snapshot (no copy)"""
+        import numpy as np
+        if buffer is None:
+            return np.zeros(0, dtype=record_dtype())
+        return np.frombuffer(buffer, dtype=record_dtype(), count=written, offset=HEADER.size)
+
+    # ----------------------------------------------
+
+    def _intern(self, space, name, item_id=0):
+        """Id of a name (with its catalog id for items) in an id space, assigning the next one if it is new"""
+        ids = self.ids[space]
+        key = name if space == 'user' else (item_id, name)
+        if key not in ids:
+            ids[key] = len(self.names[space])
+            self.names[space].append(name)
+            self.item_ids[space].append(item_id)
+            self._new_names.append((space, ids[key], name, item_id))
+        return ids[key]
+
+    def _record(self, user, kind, item, delta, item_id, timestamp):
+        with self._lock:
+            self.last_seq += 1
+            user_id = self._intern('user', user)
+            ledger_item_id = self._intern(ITEM_SPACES[kind], item, item_id)
+            event = (self.last_seq, timestamp, user, kind, item, int(delta), item_id)
+            self._unwritten.append(
+                (event, RECORD.pack(timestamp, user_id, ledger_item_id, int(delta), KIND_CODES[kind])))
+        return event
+
+    def record(self, user, kind, item, delta, item_id=0):
+        """Add one event in memory; it reaches the disk with the next flush()
+
+        item_id is the catalog id of the activity/reward (0 if it has none).
+        """
+        return self._record(user, kind, item, delta, item_id, int(time.time()))
+
+    def flush(self):
+        """Durably append every unwritten event (one write + one fsync for the whole batch)"""
+        with self._io_lock:
+            with self._lock:
+                # Events stay listed as unwritten until `written` covers them, so readers see them
+                events = list(self._unwritten)
+                names, self._new_names = self._new_names, []
+            if not events and not names:
+                return
+
+            # Names first, so a record never points at an id that is not on disk
+            if names:
+                rows = io.StringIO()
+                writer = csv.writer(rows, lineterminator='\n')
+                if not os.path.exists(self.names_path) or os.path.getsize(self.names_path) == 0:
+                    writer.writerow(NAMES_COLUMNS)
+                writer.writerows(names)
+                try:
+                    append_durably(self.names_path, rows.getvalue().encode('utf-8'))
+                except OSError:
+                    # Keep them for the next flush (before any name interned meanwhile)
+                    with self._lock:
+                        self._new_names[:0] = names
+                    raise
+
+            if events:
+                append_durably(self.path, b''.join(packed for _, packed in events))
+                with self._lock:
+                    del self._unwritten[:len(events)]
+                    self.written += len(events)
+                    self._map = None
+
+    def append(self, user, kind, item, delta, item_id=0):
+        """Durably append one event right away and return it"""
+        event = self.record(user, kind, item, delta, item_id)
+        self.flush()
+        return event
+
+    def events_for(self, user, after_seq=0):
+        """Events (seq, timestamp, user, kind, item, delta, item_id) of one user newer than the given checkpoint"""
+        events = []
+        user_id = self.ids['user'].get(user)
+        buffer, written, pending = self._snapshot()
+        if user_id is not None and after_seq < written:
+            # Unpacked straight from the tail after the checkpoint (no NumPy import on startup),
+            # only the user's records become events
+            start = HEADER.size + after_seq * RECORD.size
+            end = HEADER.size + written * RECORD.size
+            seq = after_seq
+            for timestamp, record_user, item, delta, code in RECORD.iter_unpack(memoryview(buffer)[start:end]):
+                seq += 1
+                if record_user == user_id:
+                    space = ITEM_SPACES[KIND_NAMES[code]]
+                    events.append((seq, timestamp, user, KIND_NAMES[code], self.names[space][item], delta,
+                                   self.item_ids[space][item]))
+        events.extend(event for event in pending if event[2] == user and event[0] > after_seq)
+        return events
+
+    def events_since(self, after_seq=0):
+        """Events of every user newer than the given seq, oldest first"""
+        events = []
+        buffer, written, pending = self._snapshot()
+        if after_seq < written:
+            start = HEADER.size + after_seq * RECORD.size
+            end = HEADER.size + written * RECORD.size
+            seq = after_seq
+            users = self.names['user']
+            for timestamp, user_id, item, delta, code in RECORD.iter_unpack(memoryview(buffer)[start:end]):
+                seq += 1
+                space = ITEM_SPACES[KIND_NAMES[code]]
+                events.append((seq, timestamp, users[user_id], KIND_NAMES[code], self.names[space][item], delta,
+                               self.item_ids[space][item]))
+        events.extend(event for event in pending if event[0] > after_seq)
+        return events
+
+    def derive_totals(self, user_row):
+        """Checkpointed totals of a users.csv row plus every event after it"""
+        totals = {
+            'name': user_row['name'],
+            'total_points': int(user_row['total_points']),
+            'activities_completed': int(user_row['activities_completed']),
+            'alltime_points': int(user_row['alltime_points'])
+        }
+        for event in self.events_for(totals['name'], int(user_row.get('ledger_seq', 0))):
+            apply_event(totals, event)
+        return totals
+
+    # ---------------Analytics----------------------
+    def records(self):
+        """Every written record as a NumPy structured array backed by the mmap (no copy)"""
+        buffer, written, _ = self._snapshot()
+        return self._view(buffer, written)
+
+    def derive_all_totals(self, user_rows):
+        """derive_totals for many users at once, one vectorized pass over the records"""
+        import numpy as np
+        buffer, written, pending = self._snapshot()
+        records = self._view(buffer, written)
+        user_count = len(self.names['user'])
+        # Checkpoint of each user id, records at or before it are already in users.csv
+        checkpoints = np.zeros(user_count, dtype=np.int64)
+        for row in user_rows:
+            user_id = self.ids['user'].get(row['name'])
+            if user_id is not None:
+                checkpoints[user_id] = int(row.get('ledger_seq', 0))
+
+        seqs = np.arange(1, len(records) + 1)
+        after = seqs > checkpoints[records['user']]
+        users = records['user'][after]
+        deltas = records['delta'][after].astype(np.int64)
+        completed = records['kind'][after] == KIND_CODES[KIND_COMPLETE]
+
+        points = np.bincount(users, weights=deltas, minlength=user_count)
+        alltime = np.bincount(users[completed], weights=deltas[completed], minlength=user_count)
+        tasks = np.bincount(users[completed], minlength=user_count)
+
+        all_totals = []
+        for row in user_rows:
+            totals = {
+                'name': row['name'],
+                'total_points': int(row['total_points']),
+                'activities_completed': int(row['activities_completed']),
+                'alltime_points': int(row['alltime_points'])
+            }
+            user_id = self.ids['user'].get(row['name'])
+            if user_id is not None:
+                totals['total_points'] += int(points[user_id])
+                totals['alltime_points'] += int(alltime[user_id])
+                totals['activities_completed'] += int(tasks[user_id])
+            # Events not written yet are not in the mapped file
+            for event in pending:
+                if event[2] == row['name'] and event[0] > int(row.get('ledger_seq', 0)):
+                    apply_event(totals, event)
+            all_totals.append(totals)
+        return all_totals
+
+    # ----------------------------------------------
+
+
+def apply_event(totals, event):
+    """Fold one ledger event into a totals dict"""
+    kind, delta = event[3], event[5]
+    totals['total_points'] += delta
+    if kind == KIND_COMPLETE:
+        totals['alltime_points'] += delta
+        totals['activities_completed'] += 1
@@ -0,0 +1,402 @@
+# Virtualized list view for the GUI
+# The tk.Listbox only ever holds the rows that fit in its viewport. The whole list lives in
+# memory as a few sorted sections (a header plus (value, id) keys each) and rows are formatted
+# on demand, so drawing, scrolling and resizing cost depends on the viewport height, not on the
+# catalog size. Rows just outside the viewport are formatted ahead (overscan) for smooth scrolling.
+# Single items are inserted/moved/removed in place: a bisect in their section finds the row, and
+# only that listbox row changes, keeping the scroll position and the selection.
+# A filter (a set of ids, e.g. search results) shows a subset of the sections without losing them.
+# A limit (e.g. the points of the user) styles the items by value up to it or above it; as the
+# sections are sorted by value, a new limit only restyles the rows between the old and new one.
+
+from bisect import bisect_left, bisect_right, insort
+from itertools import compress, count
+from operator import itemgetter
+import tkinter as tk
+import tkinter.font as tkfont
+
+# Rows formatted ahead above and below the viewport
+OVERSCAN = 10
+# Rows moved per mouse wheel step
+WHEEL_ROWS = 3
+
+ITEM_ID = itemgetter(1)
+# Sorts after every (value, id) key of the same value
+LAST = float('inf')
+
+
+class Section:
+    __slots__ = ('title', 'style', 'keys')
+
+    def __init__(self, title, style, keys):
+        self.title = title
+        # itemconfig options of the header row
+        self.style = style
+        # Sorted (value, id) of the items in this section
+        self.keys = keys
+
+
+class VirtualList:
+    def __init__(self, parent, format_item, scrollbar, limit_styles=None, **options):
+        """format_item(id) -> row text; the scrollbar is driven by the view, not by the listbox
+
+        limit_styles: itemconfig options of the items (within the limit, above it), see set_limit().
+        """
+        self.format_item = format_item
+        self.scrollbar = scrollbar
+        self.limit_styles = limit_styles
+        self.limit = None
+        # Each list keeps its own highlight: with the X selection exported, selecting in another
+        # list would clear this one's while `selected` still pointed at the row
+        self.listbox = tk.Listbox(parent, exportselection=False, **options)
+        self.scrollbar.config(command=self.yview)
+        # Sections shown, all the sections and the ids shown of them (None shows all)
+        self.sections = []
+        self.all_sections = []
+        self.filter = None
+        # id -> row of the item in all the sections taken end to end, rebuilt after they change
+        self._ranks = None
+        # First list row in the viewport, and the selected list row
+        self.top = 0
+        self.selected = None
+        # Rows the viewport can show, measured from the font until the widget is laid out
+        self.visible = int(options.get('height', 10))
+        self._line_height = max(1, tkfont.Font(font=self.listbox.cget('font')).metrics('linespace'))
+        # (first row, number of rows) currently materialized in the listbox
+        self._shown = (0, 0)
+        # row -> (text, style) for the rows around the viewport
+        self._cache = {}
+
+        self.listbox.bind('<Configure>', self._on_resize)
+        self.listbox.bind('<<ListboxSelect>>', self._on_select)
+        self.listbox.bind('<MouseWheel>', self._on_wheel)
+        self.listbox.bind('<Button-4>', self._on_wheel)
+        self.listbox.bind('<Button-5>', self._on_wheel)
+        self.listbox.bind('<Up>', lambda event: self._move_selection(-1))
+        self.listbox.bind('<Down>', lambda event: self._move_selection(1))
+        self.listbox.bind('<Prior>', lambda event: self._move_selection(-self.visible))
+        self.listbox.bind('<Next>', lambda event: self._move_selection(self.visible))
+
+    def pack(self, **options):
+        self.listbox.pack(**options)
+
+    def bind(self, sequence, func):
+        self.listbox.bind(sequence, func)
+
+    # ---------------Model----------------------
+    def set_sections(self, sections):
+        """Replace the whole list (selection is cleared, scroll position and filter kept)"""
+        self.all_sections = sections
+        self._ranks = None
+        self.sections = self._filtered()
+        self._relayout()
+
+    def set_filter(self, ids):
+        """Show only the items whose id is in ids (None shows all), from the top of the list"""
+        if ids is None and self.filter is None:
+            return
+        self.filter = ids
+        self.sections = self._filtered()
+        self.top = 0
+        self._relayout()
+
+    def _filtered(self):
+        """The sections cut down to the filter, in time linear in the matches (plus a C-level pass)"""
+        if self.filter is None:
+            return self.all_sections
+        if self._ranks is None:
+            self._ranks = {}
+            start = 0
+            for section in self.all_sections:
+                self._ranks.update(zip(map(ITEM_ID, section.keys), count(start)))
+                start += len(section.keys)
+        # Mark the matches by rank, then let compress() pick them out of each sorted section
+        shown = bytearray(sum(len(section.keys) for section in self.all_sections))
+        for rank in map(self._ranks.get, self.filter):
+            if rank is not None:
+                shown[rank] = 1
+        sections = []
+        start = 0
+        for section in self.all_sections:
+            end = start + len(section.keys)
+            sections.append(Section(section.title, section.style, list(compress(section.keys, shown[start:end]))))
+            start = end
+        return sections
+
+    def set_limit(self, limit):
+        """Style the items by value within/above limit, restyling only the rows that changed side"""
+        old, self.limit = self.limit, limit
+        if self.limit_styles is None or old == limit:
+            return
+        if old is None or limit is None:
+            self.redraw()
+            return
+        low, high = min(old, limit), max(old, limit)
+        first, count = self._shown
+        cached_low, cached_high = first - OVERSCAN, first + count + OVERSCAN
+        for start, section in self._layout():
+            # Items valued in (low, high] switched side, and only the ones around the viewport matter
+            begin = max(bisect_right(section.keys, (low, LAST)), cached_low - start - 1)
+            end = min(bisect_right(section.keys, (high, LAST)), cached_high - start - 1)
+            for row in range(start + 1 + begin, start + 1 + end):
+                self._cache.pop(row, None)
+                if first <= row < first + count:
+                    self.listbox.itemconfig(row - first, self._row(row)[1])
+
+    def next_above(self, section_index, limit):
+        """(value, id) key of the cheapest item of a section valued above limit (filter ignored)"""
+        keys = self.all_sections[section_index].keys if section_index < len(self.all_sections) else []
+        index = bisect_right(keys, (limit, LAST))
+        return keys[index] if index < len(keys) else None
+
+    def _layout(self):
+        """(first row, section) of every non-empty section, with a spacer row between them"""
+        layout = []
+        row = 0
+        for section in self.sections:
+            if not section.keys:
+                continue
+            if layout:
+                row += 1
+            layout.append((row, section))
+            row += 1 + len(section.keys)
+        return layout
+
+    def size(self):
+        layout = self._layout()
+        if not layout:
+            return 0
+        start, section = layout[-1]
+        return start + 1 + len(section.keys)
+
+    def row_at(self, row):
+        """(section, index of the item in it) for a list row; index -1 is the header, None a spacer"""
+        for start, section in self._layout():
+            if start <= row <= start + len(section.keys):
+                return section, row - start - 1
+        return None, None
+
+    def item_id(self, row):
+        section, index = self.row_at(row)
+        if section is None or index < 0:
+            return None
+        return section.keys[index][1]
+
+    def selected_id(self):
+        return None if self.selected is None else self.item_id(self.selected)
+
+    def curselection(self):
+        return () if self.selected is None else (self.selected,)
+
+    def _section_start(self, section):
+        for start, shown in self._layout():
+            if shown is section:
+                return start
+        return None
+
+    def find_row(self, section_index, key):
+        """List row of a (value, id) key in a section, None if it is not there"""
+        section = self.sections[section_index]
+        index = bisect_left(section.keys, key)
+        if index == len(section.keys) or section.keys[index] != key:
+            return None
+        return self._section_start(section) + 1 + index
+
+    def insert_key(self, section_index, key):
+        self._ranks = None
+        if self.filter is not None:
+            # Unfiltered the shown sections are all_sections themselves
+            insort(self.all_sections[section_index].keys, key)
+            if key[1] not in self.filter:
+                return
+        section = self.sections[section_index]
+        index = bisect_left(section.keys, key)
+        section.keys.insert(index, key)
+        if len(section.keys) == 1:
+            # A header (and spacer) appeared, redraw the viewport
+            self._relayout()
+            return
+        self._shift(self._section_start(section) + 1 + index, 1)
+
+    def remove_key(self, section_index, key):
+        self._ranks = None
+        if self.filter is not None:
+            keys = self.all_sections[section_index].keys
+            index = bisect_left(keys, key)
+            if index < len(keys) and keys[index] == key:
+                del keys[index]
+        row = self.find_row(section_index, key)
+        if row is None:
+            return
+        section = self.sections[section_index]
+        del section.keys[row - self._section_start(section) - 1]
+        if not section.keys:
+            self._relayout()
+            return
+        self._shift(row, -1)
+
+    def refresh_key(self, section_index, key):
+        """Re-format one item whose text changed but whose place did not"""
+        row = self.find_row(section_index, key)
+        if row is None:
+            return
+        self._cache.pop(row, None)
+        first, count = self._shown
+        if first <= row < first + count:
+            self.listbox.delete(row - first)
+            self._put(row - first, row)
+            self.render()
+
+    def select_key(self, section_index, key):
+        """Select an item without scrolling to it"""
+        self.selected = self.find_row(section_index, key)
+        self.render()
+
+    def redraw(self):
+        """Re-format the shown rows, after something format_item reads has changed"""
+        self._cache.clear()
+        self.render(redraw=True)
+
+    def _relayout(self):
+        self.selected = None
+        self._cache.clear()
+        self.render(redraw=True)
+
+    def _shift(self, row, delta):
+        """Apply one inserted (delta 1) or removed (delta -1) list row"""
+        self._cache.clear()
+        if self.selected is not None:
+            if delta < 0 and self.selected == row:
+                self.selected = None
+            elif self.selected >= row:
+                self.selected += delta
+        first, count = self._shown
+        if row < first:
+            # Above the viewport: move the viewport with its content, the listbox stays as it is
+            self.top += delta
+            self._shown = (first + delta, count)
+        elif row < first + count or (delta > 0 and row == first + count and count < self.visible):
+            if delta > 0:
+                self._put(row - first, row)
+            else:
+                self.listbox.delete(row - first)
+            self._shown = (first, count + delta)
+        self.render()
+
+    def _row(self, row):
+        if row not in self._cache:
+            section, index = self.row_at(row)
+            if section is None:
+                self._cache[row] = ("", None)
+            elif index < 0:
+                self._cache[row] = (section.title, section.style)
+            else:
+                key = section.keys[index]
+                style = None
+                if self.limit_styles is not None and self.limit is not None:
+                    style = self.limit_styles[key[0] > self.limit]
+                self._cache[row] = (self.format_item(key[1]), style)
+        return self._cache[row]
+
+    def _put(self, index, row):
+        """Insert one list row at a listbox index"""
+        text, style = self._row(row)
+        self.listbox.insert(index, text)
+        if style:
+            self.listbox.itemconfig(index, style)
+    # ----------------------------------------------
+
+    # ---------------Viewport----------------------
+    def render(self, redraw=False):
+        """Bring the listbox in line with the viewport, only touching rows that scrolled in or out"""
+        total = self.size()
+        self.top = max(0, min(self.top, total - self.visible))
+        first, count = self.top, max(0, min(self.visible, total - self.top))
+        shown_first, shown_count = self._shown
+
+        if redraw or first >= shown_first + shown_count or shown_first >= first + count:
+            self.listbox.delete(0, tk.END)
+            self._insert_rows(0, first, first + count)
+        else:
+            # Viewport moved by less than its height: drop and add only the rows at the edges
+            if first > shown_first:
+                self.listbox.delete(0, first - shown_first - 1)
+            elif first < shown_first:
+                self._insert_rows(0, first, shown_first)
+            end, shown_end = first + count, shown_first + shown_count
+            if end < shown_end:
+                self.listbox.delete(count, tk.END)
+            elif end > shown_end:
+                self._insert_rows(tk.END, shown_end, end)
+        self._shown = (first, count)
+
+        # Keep only the formatted rows around the viewport, and format the overscan ahead
+        low, high = max(0, first - OVERSCAN), min(total, first + count + OVERSCAN)
+        for row in [row for row in self._cache if not low <= row < high]:
+            del self._cache[row]
+        for row in range(low, high):
+            self._row(row)
+
+        self.listbox.selection_clear(0, tk.END)
+        if self.selected is not None and first <= self.selected < first + count:
+            self.listbox.selection_set(self.selected - first)
+        if total:
+            self.scrollbar.set(first / total, (first + count) / total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _insert_rows(self, index, start, end):
+        """Insert list rows [start, end) at a listbox index (0 or END)"""
+        position = 0 if index == 0 else self.listbox.index(tk.END)
+        for row in range(start, end):
+            self._put(position, row)
+            position += 1
+
+    def see(self, row):
+        """Scroll so that a list row is in the viewport"""
+        if row < self.top:
+            self.top = row
+        elif row >= self.top + self.visible:
+            self.top = row - self.visible + 1
+        self.render()
+
+    def yview(self, *args):
+        """Scrollbar command: ('moveto', fraction) or ('scroll', n, 'units'|'pages')"""
+        if not args:
+            return
+        if args[0] == 'moveto':
+            self.top = int(float(args[1]) * self.size())
+        elif args[0] == 'scroll':
+            step = int(args[1])
+            self.top += step * self.visible if args[2] == 'pages' else step
+        self.render()
+
+    def _on_resize(self, event):
+        visible = max(1, event.height // self._line_height)
+        if visible != self.visible:
+            self.visible = visible
+            self.render()
+
+    def _on_wheel(self, event):
+        if event.num == 4 or getattr(event, 'delta', 0) > 0:
+            self.top -= WHEEL_ROWS
+        else:
+            self.top += WHEEL_ROWS
+        self.render()
+        return 'break'
+
+    def _on_select(self, event):
+        selection = self.listbox.curselection()
+        if selection:
+            self.selected = self._shown[0] + selection[0]
+
+    def _move_selection(self, step):
+        total = self.size()
+        if not total:
+            return 'break'
+        row = self.top if self.selected is None else self.selected + step
+        self.selected = max(0, min(row, total - 1))
+        self.see(self.selected)
+        self.listbox.event_generate('<<ListboxSelect>>')
+        return 'break'
+    # ----------------------------------------------
@@ -2,7 +2,16 @@
 # is not the major version
 
 from os import name
-import pandas as pd
+import time
+from ledger import Ledger, KIND_COMPLETE, KIND_REDEEM
+from storage import open_storage
+import core
+from ranks import RankEngine
+from leaderboard import Leaderboard, CRITERIA
+from rollups import Rollups, PERIODS
+from streaks import StreakEngine
+from rates import EarningRates
+from scheduler import Scheduler, next_time, daily, weekly
 
 # file = input("Enter the csv file name:")
 # df = pd.read_csv(f"{file}.csv")
@@ -10,198 +19,224 @@ import pandas as pd
 # ---------------Technical_Block----------------------
 # Load Users data
 def load_data():
-    global df_users, df_activities, df_rewards, df_achievements
-    df_users = pd.read_csv('users.csv')
-    df_activities = pd.read_csv('activities.csv')
-    df_rewards = pd.read_csv('rewards.csv')
-    df_achievements = pd.read_csv('achievements.csv')
+    # Plain columns from storage
+    global storage, users, activities, rewards, achievements
+    storage = open_storage()
+    users = storage.load_columns('users')
+    activities = storage.load_columns('activities')
+    rewards = storage.load_columns('rewards')
+    achievements = storage.load_columns('achievements')
 
     return 'Data loaded successfully!'
 
-# Sorting function in ascending order by points/prices
-def quick_sort_by_points(arr):
-    if len(arr) <= 1:
-        return arr
-    pivot = arr[len(arr) // 2][1]
-    left = [x for x in arr if x[1] < pivot]
-    middle = [x for x in arr if x[1] == pivot]
-    right = [x for x in arr if x[1] > pivot]
+# Built on first use, then every completion/redemption only moves the current user
+def get_leaderboard():
+    global leaderboard
+    if leaderboard is None:
+        rows = [user.to_row() for user in core.users_from_columns(storage.load_columns('users'))]
+        leaderboard = Leaderboard(test_ranks)
+        leaderboard.load(core.User(**totals) for totals in ledger.derive_all_totals(rows))
+        leaderboard.update(user1)
+    return leaderboard
 
-    return quick_sort_by_points(left) + middle + quick_sort_by_points(right)
+# Midnight reset and the current user's reminders, run between prompts (nothing runs while waiting for input)
+def start_scheduler(user_name):
+    scheduler = Scheduler()
+    scheduler.schedule(('daily_reset',), next_time(time.time(), 0, 0),
+                       lambda key: print('\n>> New day! Daily tasks are open again.'), daily())
+    try:
+        reminders = storage.load('schedules')
+    except FileNotFoundError:
+        reminders = []
+    for reminder in reminders:
+        if reminder['user'] != user_name:
+            continue
+        hour, minute = map(int, reminder['at'].split(':'))
+        repeat = daily(hour, minute) if reminder['weekday'] < 0 else weekly(reminder['weekday'], hour, minute)
+        key = ('reminder', reminder['user'], reminder['activity_id'], reminder['weekday'], reminder['at'])
+        scheduler.schedule(key, repeat(time.time()), remind, repeat)
+    return scheduler
+
+def remind(key):
+    # Reminders of deleted activities stay silent
+    position = test_act.position_of(key[2])
+    if position is not None:
+        print(f'\n>> Reminder: time for {test_act.names[position]}!')
 # -------------------------------------
 
-# At the moment of initilizing user should provide its own lists
-class Activity:
-    def __init__(self, activity_names=None, activity_points=None, daily_task=None):
-        #  If the user doesn't provide a list, that list is used by default
-        if activity_names is None:
-            activity_names = df_activities.loc[:, 'activity_name'].tolist()
-        #  If the user does provide a list, that list is used instead of default one
-        self.activity_names = activity_names
-        # Same here:
-        if activity_points is None:
-            activity_points = df_activities.loc[:, 'activity_points'].tolist()
-        self.activity_points = activity_points
-        if daily_task is None:
-            daily_task = df_activities.loc[:, 'daily_task'].tolist()
-        self.daily_task = daily_task
-        
-        
-        
+# Console views over the shared catalogs, the tables are used by default
+class Activity(core.ActivityCatalog):
+    __slots__ = ()
+
+    def __init__(self, columns=None):
+        super().__init__(activities if columns is None else columns)
+
     def show_activities(self):
         print('Available Activities:\n')
-        
-        daily_arr = []
-        misc_arr = []
-
-        # Collect tasks into arrays
-        for name, points, is_daily in zip(self.activity_names, self.activity_points, self.daily_task):
-            if is_daily:
-                daily_arr.append((name, points))
-            else:
-                misc_arr.append((name, points))
-        
-        # Sort both arrays by points (ascending)
-        daily_arr = quick_sort_by_points(daily_arr)
-        misc_arr = quick_sort_by_points(misc_arr)
-        
+        daily_arr, misc_arr = self.sections()
+
         # Display daily tasks
         print('Daily Tasks:')
-        for i in range(len(daily_arr)):
-            print(f'{i + 1}. {daily_arr[i][0]} ({daily_arr[i][1]} points)')
+        for i, position in enumerate(daily_arr):
+            current, longest = streaks.get(user1.name, self.ids[position])
+            streak = f' - streak {current} days (best {longest})' if longest else ''
+            print(f'{i + 1}. {self.names[position]} ({self.values[position]} points){streak}')
 
         # Display miscellaneous tasks
         print('\nMiscellaneous:')
-        for i in range(len(misc_arr)):
-            print(f'{i + 1}. {misc_arr[i][0]} ({misc_arr[i][1]} points)')
-
-
-# Similar to Activity class in terms of initialization
-class Reward:
-    def __init__(self, reward_names=None, reward_prices=None, regular_reward=None):
-        if reward_names is None:
-            reward_names = df_rewards.loc[:, 'reward_name'].tolist()
-        self.reward_names = reward_names
-        if reward_prices is None:
-            reward_prices = df_rewards.loc[:, 'reward_price'].tolist()
-        self.reward_prices = reward_prices
-        if regular_reward is None:
-            regular_reward = df_rewards.loc[:, 'regular_reward'].tolist()
-        self.regular_reward = regular_reward
-        
-        
+        for i, position in enumerate(misc_arr):
+            print(f'{i + 1}. {self.names[position]} ({self.values[position]} points)')
+
+
+class Reward(core.RewardCatalog):
+    __slots__ = ()
+
+    def __init__(self, columns=None):
+        super().__init__(rewards if columns is None else columns)
+
     def show_rewards(self):
-        
         print('Available Rewards:\n')
-        reg_arr = []
-        long_term_arr = []
-        
-        for name, price, is_regular in zip(self.reward_names, self.reward_prices, self.regular_reward):
-            if is_regular:
-                reg_arr.append((name, price))
-            else:
-                long_term_arr.append((name, price))
-                
-        # Sort both arrays by prices (ascending)
-        reg_arr = quick_sort_by_points(reg_arr)
-        long_term_arr = quick_sort_by_points(long_term_arr)
-        
+        reg_arr, long_term_arr = self.sections()
+
         # Display regular rewards
         print('Regular Rewards:')
-        for i in range(len(reg_arr)):
-            print(f'{i + 1}. {reg_arr[i][0]} ({reg_arr[i][1]} points)')
-            
+        for i, position in enumerate(reg_arr):
+            print(f'{i + 1}. {self.names[position]} ({self.values[position]} points)')
+
         # Display long-term rewards
         print('\nLong-term Rewards:')
-        for i in range(len(long_term_arr)):
-            print(f'{i + 1}. {long_term_arr[i][0]} ({long_term_arr[i][1]} points)')
-        
-class Achievement:
-    def __init__(self, achievement_names=None, points_required=None, tasks_required=None):
-        if achievement_names is None:
-            achievement_names = df_achievements.loc[:, 'achievement_name'].tolist()
-        self.achievement_names = achievement_names
-        if points_required is None:
-            points_required = df_achievements.loc[:, 'points_required'].tolist()
-        self.points_required = points_required
-        if tasks_required is None:
-            tasks_required = df_achievements.loc[:, 'tasks_required'].tolist()
-        self.tasks_required = tasks_required
-            
+        for i, position in enumerate(long_term_arr):
+            print(f'{i + 1}. {self.names[position]} ({self.values[position]} points)')
+
+
+class Achievement(core.AchievementCatalog):
+    __slots__ = ()
+
+    def __init__(self, columns=None):
+        super().__init__(achievements if columns is None else columns)
+
     def show_achievements(self):
         print('Available Achivements: ')
-        i = 0
-        for achivement, points, tasks in zip(self.achievement_names, self.points_required, self.tasks_required):
-            i += 1
-            print(f'{i}. {achivement} ({points} points OR {tasks} completed tasks)')
-    
-class User:
-    def __init__(self, name, total_points=0, activities_completed=0, alltime_points=0):
-        self.name = name
-        self.total_points = total_points
-        self.activities_completed = activities_completed
-        self.alltime_points = alltime_points
-    
+        for i, achievement in enumerate(self):
+            print(f'{i + 1}. {achievement.name} ({achievement.points_required} points OR {achievement.tasks_required} completed tasks)')
+
+
+# Points arithmetic lives in core.User, this adds the console I/O
+class User(core.User):
+    __slots__ = ()
+
     #------------CSV_File_Managment---------------
     def add_user(self):
-        new_user = pd.DataFrame([[self.name, self.total_points, self.activities_completed, self.alltime_points]], columns=['name', 'total_points', 'activities_completed', 'alltime_points'])
-        df_users.to_csv('users.csv', index=False, mode='a', header=False)
+        self.ledger_seq = ledger.last_seq
+        storage.insert('users', self.to_row())
 
         return f'{self.name} added successfully!'
 
     def update_user(self):
-        df_users.loc[df_users['name'] == self.name, 'total_points'] = self.total_points
-        df_users.loc[df_users['name'] == self.name, 'activities_completed'] = self.activities_completed
-        df_users.loc[df_users['name'] == self.name, 'alltime_points'] = self.alltime_points
-        df_users.to_csv('users.csv', index=False)
+        self.ledger_seq = ledger.last_seq
+        storage.update_user(self.name, self.to_row())
 
         return f'User \"{self.name}\" is updated successfully!'
-    
+
     def delete_user(self):
-        df_users.drop(index=[self.name], inplace=True)
-        df_users.to_csv('users.csv', index=False)
+        storage.delete_user(self.name)
+        # History, streaks and rates go with the user, a new namesake starts from nothing
+        rollups.forget(self.name)
+        streaks.forget(self.name)
+        rates.forget(self.name)
+        rollups.save()
+        streaks.save()
 
         return f'{self.name} deleted successfully!'
     #----------------------------------------------
-    
+
     def complete_activity(self, activity: Activity):
         act_num = int(input('Enter the activity number you have completed: '))
-        if 0 < act_num < len(activity.activity_names)+1:
-            self.total_points += activity.activity_points[act_num - 1]
-            self.alltime_points += activity.activity_points[act_num - 1]
-            self.activities_completed += 1
-            print(f'Activity "{activity.activity_names[act_num - 1]}" completed! You earned {activity.activity_points[act_num - 1]} points.')
+        if 0 < act_num < len(activity)+1:
+            done = activity[act_num - 1]
+            self.complete(done.points)
+            event = ledger.append(self.name, KIND_COMPLETE, done.name, done.points, done.id)
+            rollups.add(event)
+            streaks.add(event)
+            rates.add(event)
+            if leaderboard is not None:
+                leaderboard.update(self)
+            print(f'Activity "{done.name}" completed! You earned {done.points} points.')
+            if done.daily:
+                print(f'Streak: {streaks.get(self.name, done.id)[0]} days in a row!')
         else:
             print(f'{act_num} is invalid activity number!')
-    
+
     def redeem_reward(self, reward: Reward):
         rwd_num = int(input('Enter the reward number you would like to redeem: '))
-        if 0 < rwd_num < len(reward.reward_names)+1:
-            if self.total_points < reward.reward_prices[rwd_num - 1]:
-                print(f'You have not enough points to redeem the reward \"{reward.reward_names[rwd_num - 1]}\"!')
+        if 0 < rwd_num < len(reward)+1:
+            chosen = reward[rwd_num - 1]
+            if not self.redeem(chosen.price):
+                print(f'You have not enough points to redeem the reward \"{chosen.name}\"!')
                 return
-            self.total_points -= reward.reward_prices[rwd_num - 1]
-            print(f'Reward "{reward.reward_names[rwd_num - 1]}" successfully redeemed! You spent {reward.reward_prices[rwd_num - 1]} points.')
+            rollups.add(ledger.append(self.name, KIND_REDEEM, chosen.name, -chosen.price, chosen.id))
+            if leaderboard is not None:
+                leaderboard.update(self)
+            print(f'Reward "{chosen.name}" successfully redeemed! You spent {chosen.price} points.')
             print(f'You have {self.total_points} points left.')
         else:
             print(f'{rwd_num} is invalid reward number!')
-    
-    def define_rank(self, achievement: Achievement):
-        # Determine rank based on points and activities completed
-        for i in range(len(achievement.achievement_names)):
-            if self.alltime_points < achievement.points_required[i] and self.activities_completed < achievement.tasks_required[i]:
-                return achievement.achievement_names[i-1]
-        # Return last rank if any threshold is met for the highest rank
-        return achievement.achievement_names[-1]
-            
+
+    def define_rank(self, ranks: RankEngine):
+        # Same rank rules as the GUI, resolved by bisect over the compiled thresholds
+        return ranks.rank_of(self)
+
+    def show_leaderboard(self):
+        for i, label in enumerate(CRITERIA.values()):
+            print(f'{i + 1}. {label}')
+        crit_num = input('Sort the leaderboard by: ')
+        if crit_num not in [str(i + 1) for i in range(len(CRITERIA))]:
+            print(f'{crit_num} is invalid leaderboard number!')
+            return
+        criterion = list(CRITERIA)[int(crit_num) - 1]
+        board = get_leaderboard()
+
+        print(f'----------------Leaderboard ({CRITERIA[criterion]}):----------------')
+        for place, (name, score) in enumerate(board.top(criterion, 10), start=1):
+            if criterion == 'rank':
+                score = test_ranks.names[score] if len(test_ranks) else 'Beginner'
+            print(f'{place}. {name} : {score}')
+        print(f"Your position : {board.position(criterion, self.name)} of {len(board)}")
+        print('----------------------------------------------')
+
+    def show_stats(self):
+        for i, period in enumerate(PERIODS):
+            print(f'{i + 1}. {period.capitalize()}')
+        period_num = input('Show points per: ')
+        if period_num not in [str(i + 1) for i in range(len(PERIODS))]:
+            print(f'{period_num} is invalid period number!')
+            return
+        period = PERIODS[int(period_num) - 1]
+
+        # Read from the rollups, the ledger is not scanned
+        print(f'----------------Stats per {period} (last 12):----------------')
+        for label, bucket in rollups.series(self.name, period, 12):
+            print(f'{label} : +{bucket.earned} / -{bucket.spent} points, {bucket.tasks} tasks')
+        print('----------------------------------------------')
+
     def show_status(self):
         print('----------------Status:-----------------------')
         print(f"Currently you have : {self.total_points} points.")
         print(f"Total Activities Completed : {self.activities_completed}")
         print(f"All-time Points Earned : {self.alltime_points}")
-        print(f"You're current rank is: {self.define_rank(test_acv)}")
+        rank = self.define_rank(test_ranks)
+        if rank is not None:
+            print(f"You're current rank is: {rank.name}")
+            if rank.next_name:
+                print(f"Next rank {rank.next_name} in : {rank.points_needed} points OR {rank.tasks_needed} tasks")
+                points_rate, tasks_rate = rates.rates([self.name])
+                days = test_ranks.forecast([self.alltime_points], [self.activities_completed],
+                                           points_rate, tasks_rate)[0][rank.index + 1]
+                if days != float('inf'):
+                    eta = time.strftime('%Y-%m-%d', time.localtime(time.time() + days * 86400))
+                    print(f"At your current pace ({points_rate[0]:.1f} points/day) : around {eta}")
         print('----------------------------------------------')
-    
+
 
 class Manager:
     def __init__(self):
@@ -216,21 +251,8 @@ class Manager:
         else:
             return f'Error: Invalid input for daily_task. Please enter "yes" or "no".'
         
-        new_activity = pd.DataFrame([[activity_name, activity_points, daily_task]], columns = ['activity_name', 'activity_points', 'daily_task'])
-        # Ensure the CSV file ends with a newline before appending to avoid concatenation with the last line
-        try:
-            with open('activities.csv', 'rb+') as f:
-                f.seek(0, 2)
-                if f.tell() > 0:
-                    f.seek(-1, 2)
-                    last = f.read(1)
-                    if last != b'\n':
-                        f.write(b'\n')
-        except FileNotFoundError:
-            # File doesn't exist yet, to_csv will create it
-            pass
-
-        new_activity.to_csv('activities.csv', index=False, mode='a', header=False)
+        storage.insert('activities', {'activity_name': activity_name, 'activity_points': activity_points,
+                                      'daily_task': daily_task})
         return f'Activity \"{activity_name}\" added successfully!'
 
     def add_reward(self, reward_name, reward_price, regular_reward):
@@ -242,35 +264,36 @@ class Manager:
         else:
             return f'Error: Invalid input for regular_reward. Please enter "yes" or "no".'
         
-        new_reward = pd.DataFrame([[reward_name, reward_price, regular_reward]], columns=['reward_name', 'reward_price', 'regular_reward'])
-        # Ensure the CSV file ends with a newline before appending to avoid concatenation with the last line
-        try:
-            with open('rewards.csv', 'rb+') as f:
-                f.seek(0, 2)
-                if f.tell() > 0:
-                    f.seek(-1, 2)
-                    last = f.read(1)
-                    if last != b'\n':
-                        f.write(b'\n')
-        except FileNotFoundError:
-            # File doesn't exist yet, to_csv will create it
-            pass
-        new_reward.to_csv('rewards.csv', index=False, mode='a', header=False)
+        storage.insert('rewards', {'reward_name': reward_name, 'reward_price': reward_price,
+                                   'regular_reward': regular_reward})
         return f'Reward \"{reward_name}\" added successfully!'
 
 # -------------Testing the classes------------------
 load_data()
+ledger = Ledger()
+rollups = Rollups()
+rollups.catch_up(ledger)
+streaks = StreakEngine()
+streaks.catch_up(ledger)
+rates = EarningRates()
+rates.seed(rollups)
 
 test_act = Activity()
 test_rwd = Reward()
 test_mgr = Manager()
 test_acv = Achievement()
+test_ranks = RankEngine(test_acv)
+leaderboard = None
 
-user1 = User(df_users.iloc[0, 0], df_users.iloc[0, 1], df_users.iloc[0, 2], df_users.iloc[0, 3])
+# Checkpoint from users.csv plus every ledger event recorded after it
+first_user = core.users_from_columns(users)[0]
+user1 = User(**ledger.derive_totals(first_user.to_row()))
+scheduler = start_scheduler(user1.name)
 
 while True:
+    scheduler.run_due()
     print('\n\nAvailable Actions: ')
-    lst_act = ['Quit', 'Show Activities', 'Show Rewards', 'Show Status','Complete Activity', 'Redeem Reward', 'Add Activity', 'Add Reward', 'Show Achivements']
+    lst_act = ['Quit', 'Show Activities', 'Show Rewards', 'Show Status','Complete Activity', 'Redeem Reward', 'Add Activity', 'Add Reward', 'Show Achivements', 'Show Leaderboard', 'Show Stats']
     for i in range(len(lst_act)):
         print(f'{i}. {lst_act[i]}')
 
@@ -280,6 +303,9 @@ while True:
     match i:
         case '0':
             user1.update_user()
+            rollups.save()
+            streaks.save()
+            storage.close()
             break
         case '1':
             test_act.show_activities()
@@ -314,6 +340,10 @@ while True:
             print(result)
         case '8':
             test_acv.show_achievements()
+        case '9':
+            user1.show_leaderboard()
+        case '10':
+            user1.show_stats()
         case _:
             print(f'{i} is invalid operation number!')
             
\ No newline at end of file
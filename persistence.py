@@ -0,0 +1,71 @@
+# Background persistence for the GUI
+# One writer thread owns all disk I/O, the Tk thread only submits jobs and never waits on disk.
+# Jobs are keyed: submitting a key that is still waiting replaces its job (latest state wins),
+# so repeated saves of the same user/table within the debounce delay become one write.
+
+import queue
+import threading
+import time
+
+DEBOUNCE_DELAY = 0.5
+
+
+class PersistenceWorker:
+    def __init__(self, debounce=DEBOUNCE_DELAY):
+        self.debounce = debounce
+        # key -> [due_time, job, callbacks], insertion ordered
+        self._jobs = {}
+        self._running = False
+        self._cond = threading.Condition()
+        # (callback, error) pairs waiting to be run on the Tk thread
+        self.completed = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, key, job, callback=None, delay=None):
+        """Queue job() under key; callback(error) is handed back through `completed`"""
+        delay = self.debounce if delay is None else delay
+        with self._cond:
+            callbacks = self._jobs.pop(key, [None, None, []])[2]
+            if callback is not None:
+                callbacks.append(callback)
+            self._jobs[key] = [time.monotonic() + delay, job, callbacks]
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    due = [key for key, entry in self._jobs.items() if entry[0] <= now]
+                    if due:
+                        break
+                    timeout = min((entry[0] for entry in self._jobs.values()), default=None)
+                    self._cond.wait(None if timeout is None else timeout - now)
+                batch = [self._jobs.pop(key) for key in due]
+                self._running = True
+
+            for _, job, callbacks in batch:
+                error = None
+                try:
+                    job()
+                except Exception as e:
+                    error = e
+                if callbacks:
+                    for callback in callbacks:
+                        self.completed.put((callback, error))
+                elif error is not None:
+                    self.completed.put((None, error))
+
+            with self._cond:
+                self._running = False
+                self._cond.notify_all()
+
+    def flush(self):
+        """Run every waiting job now and block until the queue is idle (used on exit)"""
+        with self._cond:
+            for entry in self._jobs.values():
+                entry[0] = 0
+            self._cond.notify_all()
+            while self._jobs or self._running:
+                self._cond.wait()
@@ -0,0 +1,110 @@
+# Rank engine shared by the GUI and the Console version
+# achievements.csv is compiled once into two sorted threshold arrays (points, tasks).
+# A rank is reached with its points OR its tasks, and ranks are reached in order, so the
+# current rank is the last one covered by either bisect: O(log n) per lookup.
+# rank_all() does the same for a whole users table with NumPy searchsorted (imported lazily),
+# and forecast() turns daily earning rates into days until every rank for many users at once.
+
+from array import array
+from bisect import bisect_right
+
+
+class Rank:
+    __slots__ = ('index', 'name', 'next_name', 'points_needed', 'tasks_needed')
+
+    def __init__(self, index, name, next_name=None, points_needed=0, tasks_needed=0):
+        self.index = index
+        self.name = name
+        # Next rank and what is still missing for it (either one is enough), None at the top
+        self.next_name = next_name
+        self.points_needed = points_needed
+        self.tasks_needed = tasks_needed
+
+
+class RankEngine:
+    def __init__(self, achievements):
+        """Compile an AchievementCatalog into non-decreasing threshold arrays"""
+        self.names = list(achievements.names)
+        self.points = array('i')
+        self.tasks = array('i')
+        # Running maximum: a rank never needs less than the one before it
+        points_max = tasks_max = 0
+        for points, tasks in zip(achievements.points_required, achievements.tasks_required):
+            points_max = max(points_max, points)
+            tasks_max = max(tasks_max, tasks)
+            self.points.append(points_max)
+            self.tasks.append(tasks_max)
+
+    def __len__(self):
+        return len(self.names)
+
+    def index(self, alltime_points, tasks):
+        """Position of the reached rank (the first rank if none is reached yet)"""
+        return max(bisect_right(self.points, alltime_points), bisect_right(self.tasks, tasks), 1) - 1
+
+    def lookup(self, alltime_points, tasks):
+        """Current rank, next rank and the distance to it in one lookup (None without achievements)"""
+        if not self.names:
+            return None
+        index = self.index(alltime_points, tasks)
+        if index + 1 == len(self.names):
+            return Rank(index, self.names[index])
+        return Rank(index, self.names[index], self.names[index + 1],
+                    max(0, self.points[index + 1] - alltime_points),
+                    max(0, self.tasks[index + 1] - tasks))
+
+    def rank_of(self, user):
+        return self.lookup(user.alltime_points, user.activities_completed)
+
+    def rank_all(self, users):
+        """Ranks of a whole users table ({column: values} or a DataFrame) in one vectorized pass
+
+        Returns a dict of NumPy arrays: rank (index), name, next_name, points_needed, tasks_needed
+        and progress (0..1 towards the next rank, 1 at the top rank); None without achievements.
+        """
+        import numpy as np
+        if not self.names:
+            return None
+        alltime = np.asarray(users['alltime_points'], dtype=np.int64)
+        tasks = np.asarray(users['activities_completed'], dtype=np.int64)
+        points_required = np.frombuffer(self.points, dtype=np.intc).astype(np.int64)
+        tasks_required = np.frombuffer(self.tasks, dtype=np.intc).astype(np.int64)
+
+        rank = np.maximum(np.maximum(np.searchsorted(points_required, alltime, side='right'),
+                                     np.searchsorted(tasks_required, tasks, side='right')), 1) - 1
+        has_next = rank + 1 < len(self.names)
+        next_rank = np.minimum(rank + 1, len(self.names) - 1)
+        next_points = points_required[next_rank]
+        next_tasks = tasks_required[next_rank]
+
+        # Either threshold is enough, so progress is the better of the two ratios
+        points_ratio = np.divide(alltime, next_points, out=np.ones(len(alltime)), where=next_points > 0)
+        tasks_ratio = np.divide(tasks, next_tasks, out=np.ones(len(tasks)), where=next_tasks > 0)
+        names = np.array(self.names + [None], dtype=object)
+        return {
+            'rank': rank,
+            'name': names[rank],
+            'next_name': names[np.where(has_next, next_rank, len(self.names))],
+            'points_needed': np.where(has_next, np.maximum(next_points - alltime, 0), 0),
+            'tasks_needed': np.where(has_next, np.maximum(next_tasks - tasks, 0), 0),
+            'progress': np.where(has_next, np.minimum(np.maximum(points_ratio, tasks_ratio), 1.0), 1.0)
+        }
+
+    def forecast(self, alltime_points, tasks, points_per_day, tasks_per_day):
+        """Days until every rank (columns) for every user (rows) at their daily rates
+
+        0 for ranks already reached, inf where neither rate ever gets there.
+        """
+        import numpy as np
+        alltime = np.asarray(alltime_points, dtype=np.float64)[:, None]
+        done = np.asarray(tasks, dtype=np.float64)[:, None]
+        points_rate = np.asarray(points_per_day, dtype=np.float64)[:, None]
+        tasks_rate = np.asarray(tasks_per_day, dtype=np.float64)[:, None]
+        points_missing = np.maximum(np.frombuffer(self.points, dtype=np.intc)[None, :] - alltime, 0)
+        tasks_missing = np.maximum(np.frombuffer(self.tasks, dtype=np.intc)[None, :] - done, 0)
+
+        # Either threshold is enough, so the rank comes with whichever is reached first
+        with np.errstate(divide='ignore', invalid='ignore'):
+            points_days = np.where(points_missing > 0, points_missing / points_rate, 0.0)
+            tasks_days = np.where(tasks_missing > 0, tasks_missing / tasks_rate, 0.0)
+        return np.minimum(points_days, tasks_days)
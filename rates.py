@@ -0,0 +1,70 @@
+# Rolling earning rates shared by the GUI and the Console version (rank forecasts)
+# Per user, points and tasks per day as exponentially weighted averages over the days since the
+# user's first completion (time constant RATE_WINDOW days). The decayed sums only move forward
+# by the days elapsed, so a completion updates them in O(1). They are seeded from the daily
+# rollups on start instead of rescanning the ledger, and read for many users at once with NumPy.
+
+import calendar
+import math
+import time
+
+from ledger import KIND_COMPLETE, local_day
+
+# Days over which older activity fades out (weight 1/e after this many days)
+RATE_WINDOW = 14
+
+
+def label_day(label):
+    """Local day number (see ledger.local_day) of a 'YYYY-MM-DD' rollup label"""
+    return calendar.timegm(time.strptime(label, '%Y-%m-%d')) // 86400
+
+
+class EarningRates:
+    def __init__(self, window=RATE_WINDOW):
+        # Weight left to a day's total after one more day
+        self.decay = math.exp(-1 / window)
+        # user -> [decayed points, decayed tasks, last day folded in, first day]
+        self.state = {}
+
+    def seed(self, rollups):
+        """Fold in the daily buckets of every user in the rollups"""
+        for user, period in list(rollups.buckets):
+            if period == 'day':
+                for label, bucket in rollups.series(user, 'day'):
+                    self._add(user, label_day(label), bucket.earned, bucket.tasks)
+
+    def add(self, event):
+        """Fold one ledger event (seq, timestamp, user, kind, item, delta, item_id); only completions count"""
+        _, timestamp, user, kind, _, delta, _ = event
+        if kind == KIND_COMPLETE:
+            self._add(user, local_day(timestamp), delta, 1)
+
+    def _add(self, user, day, points, tasks):
+        state = self.state.get(user)
+        if state is None:
+            state = self.state[user] = [0.0, 0.0, day, day]
+        if day > state[2]:
+            factor = self.decay ** (day - state[2])
+            state[0] *= factor
+            state[1] *= factor
+            state[2] = day
+        # A day older than the last one counts with the weight it has by now
+        weight = self.decay ** (state[2] - day)
+        state[0] += points * weight
+        state[1] += tasks * weight
+        state[3] = min(state[3], day)
+
+    def forget(self, user):
+        self.state.pop(user, None)
+
+    def rates(self, users, day=None):
+        """(points per day, tasks per day) NumPy arrays for a list of user names, as of a local day"""
+        import numpy as np
+        day = local_day(int(time.time())) if day is None else day
+        state = np.array([self.state.get(user, (0.0, 0.0, day, day)) for user in users],
+                         dtype=np.float64).reshape(-1, 4)
+        # Decay up to today, then divide by the total weight of the days since the first one
+        decayed = state[:, :2] * (self.decay ** np.maximum(day - state[:, 2], 0))[:, None]
+        days = np.maximum(day - state[:, 3] + 1, 1)
+        weights = (1 - self.decay ** days) / (1 - self.decay)
+        return decayed[:, 0] / weights, decayed[:, 1] / weights
@@ -0,0 +1,88 @@
+# Pre-aggregated history shared by the GUI and the Console version
+# Every ledger event is folded, as it is recorded, into its user's day, week (from Monday) and
+# month buckets in local time: points earned, points spent, tasks done and per-activity counts.
+# The buckets are a ledger sidecar (see sidecar.py) saved in ledger_rollups.csv, each row with
+# the seq of the newest event folded into it.
+# Charts read a few hundred buckets instead of scanning the events.
+
+import json
+import time
+
+from ledger import KIND_COMPLETE, local_day
+from sidecar import LedgerSidecar
+
+ROLLUPS_FILE = 'ledger_rollups.csv'
+PERIODS = ('day', 'week', 'month')
+
+
+def bucket_labels(timestamp):
+    """Day, week (its Monday) and month labels of a timestamp in local time; they sort by date"""
+    day = local_day(timestamp)
+    # Day 0 (1970-01-01) was a Thursday
+    monday = day - (day + 3) % 7
+    date = time.strftime('%Y-%m-%d', time.gmtime(day * 86400))
+    return date, time.strftime('%Y-%m-%d', time.gmtime(monday * 86400)), date[:7]
+
+
+class Bucket:
+    __slots__ = ('earned', 'spent', 'tasks', 'activities', 'last_seq')
+
+    def __init__(self, earned=0, spent=0, tasks=0, activities=None, last_seq=0):
+        self.earned = earned
+        self.spent = spent
+        self.tasks = tasks
+        # activity name -> completions
+        self.activities = activities or {}
+        self.last_seq = last_seq
+
+
+class Rollups(LedgerSidecar):
+    COLUMNS = ['user', 'period', 'bucket', 'earned', 'spent', 'tasks', 'activities', 'last_seq']
+
+    def __init__(self, path=ROLLUPS_FILE):
+        # (user, period) -> {bucket label: Bucket}
+        self.buckets = {}
+        super().__init__(path)
+
+    def _load_row(self, row):
+        bucket = Bucket(int(row['earned']), int(row['spent']), int(row['tasks']),
+                        json.loads(row['activities']), int(row['last_seq']))
+        self.buckets.setdefault((row['user'], row['period']), {})[row['bucket']] = bucket
+
+    def _fold(self, event):
+        """Fold an event into its three buckets"""
+        seq, timestamp, user, kind, item, delta, item_id = event
+        for period, label in zip(PERIODS, bucket_labels(timestamp)):
+            buckets = self.buckets.setdefault((user, period), {})
+            bucket = buckets.get(label)
+            if bucket is None:
+                bucket = buckets[label] = Bucket()
+            if kind == KIND_COMPLETE:
+                bucket.earned += delta
+                bucket.tasks += 1
+                bucket.activities[item] = bucket.activities.get(item, 0) + 1
+            else:
+                bucket.spent -= delta
+            bucket.last_seq = seq
+        return True
+
+    def _forget(self, user):
+        dropped = False
+        for period in PERIODS:
+            dropped = self.buckets.pop((user, period), None) is not None or dropped
+        return dropped
+
+    def _rows(self):
+        return [(user, period, label, bucket.earned, bucket.spent, bucket.tasks,
+                 json.dumps(bucket.activities, ensure_ascii=False), bucket.last_seq)
+                for (user, period), buckets in self.buckets.items()
+                for label, bucket in buckets.items()]
+
+    def series(self, user, period, count=None):
+        """The user's last count buckets of a period (all if None) as (label, Bucket), oldest first"""
+        with self._lock:
+            buckets = self.buckets.get((user, period), {})
+            labels = sorted(buckets)
+            if count is not None:
+                labels = labels[-count:]
+            return [(label, buckets[label]) for label in labels]
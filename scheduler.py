@@ -0,0 +1,131 @@
+# Timer scheduler shared by the GUI and the Console version
+# Due times are kept in a min-heap of [due, order, key, callback, repeat] entries: waking up pops
+# only what is due (O(log n) each) and nothing is scanned while waiting. Jobs are keyed, e.g.
+# ('reminder', user, activity, weekday, at); scheduling a key again replaces its entry, and a
+# replaced or cancelled entry is skipped when it reaches the top of the heap.
+# The GUI drives it with a single root.after armed for the earliest due time (attach()),
+# the Console calls run_due() between prompts.
+
+import heapq
+import itertools
+import time
+
+# Longest single root.after wait in seconds, so a suspended machine or a changed clock is noticed
+MAX_WAIT = 60
+
+WEEKDAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+
+def next_time(after, hour, minute, weekday=None):
+    """Next local hh:mm strictly after a timestamp, on a weekday (0 = Monday) if given"""
+    local = time.localtime(after)
+    step = 1 if weekday is None else 7
+    day = local.tm_mday + (0 if weekday is None else (weekday - local.tm_wday) % 7)
+    # mktime normalizes an overflowing day of the month and picks the DST in effect then
+    due = time.mktime((local.tm_year, local.tm_mon, day, hour, minute, 0, 0, 0, -1))
+    if due <= after:
+        due = time.mktime((local.tm_year, local.tm_mon, day + step, hour, minute, 0, 0, 0, -1))
+    return due
+
+
+def daily(hour=0, minute=0):
+    """Repeat rule: every day at hh:mm local time"""
+    return lambda due: next_time(due, hour, minute)
+
+
+def weekly(weekday, hour=0, minute=0):
+    """Repeat rule: every week on a weekday (0 = Monday) at hh:mm local time"""
+    return lambda due: next_time(due, hour, minute, weekday)
+
+
+class Scheduler:
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self._heap = []
+        # key -> its live heap entry
+        self._jobs = {}
+        # Tie-breaker, so entries due at the same time never compare their keys
+        self._order = itertools.count()
+        # Tk driving (see attach)
+        self._root = None
+        self._timer = None
+        self._armed_for = None
+        self._running = False
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def __contains__(self, key):
+        return key in self._jobs
+
+    def schedule(self, key, due, callback, repeat=None):
+        """Run callback(key) at due, then at repeat(due), repeat(repeat(due))... (replaces the key)"""
+        old = self._jobs.get(key)
+        if old is not None:
+            old[3] = None
+        entry = [due, next(self._order), key, callback, repeat]
+        self._jobs[key] = entry
+        heapq.heappush(self._heap, entry)
+        self._arm()
+
+    def cancel(self, key):
+        entry = self._jobs.pop(key, None)
+        if entry is not None:
+            entry[3] = None
+
+    def next_due(self):
+        """Earliest due time, None if nothing is scheduled"""
+        while self._heap and self._heap[0][3] is None:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def run_due(self, now=None):
+        """Run every job due by now, rescheduling repeating ones; return how many ran"""
+        now = self.clock() if now is None else now
+        ran = 0
+        while self._heap and self._heap[0][0] <= now:
+            due, _, key, callback, repeat = heapq.heappop(self._heap)
+            if callback is None:
+                continue
+            del self._jobs[key]
+            if repeat is not None:
+                # After a long sleep a missed job runs once, not once per missed period
+                next_due = repeat(due)
+                while next_due <= now:
+                    next_due = repeat(next_due)
+                self.schedule(key, next_due, callback, repeat)
+            callback(key)
+            ran += 1
+        return ran
+
+    # ---------------Tk_Driver----------------------
+    def attach(self, root):
+        """Drive the scheduler from a Tk loop"""
+        self._root = root
+        self._arm()
+
+    def _arm(self):
+        """Keep one root.after pending for the earliest due time"""
+        if self._root is None or self._running:
+            return
+        due = self.next_due()
+        if due == self._armed_for and self._timer is not None:
+            return
+        if self._timer is not None:
+            self._root.after_cancel(self._timer)
+            self._timer = None
+        self._armed_for = due
+        if due is not None:
+            wait = min(max(0.0, due - self.clock()), MAX_WAIT)
+            self._timer = self._root.after(int(wait * 1000), self._wake)
+
+    def _wake(self):
+        self._timer = None
+        self._armed_for = None
+        self._running = True
+        try:
+            self.run_due()
+        finally:
+            self._running = False
+            self._arm()
+    # ----------------------------------------------
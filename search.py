@@ -0,0 +1,131 @@
+# Incremental name search for the GUI lists
+# Names are normalized once (NFKC, case-folded, emoji variation selectors/joiners dropped,
+# underscores as spaces) and indexed two ways: a trigram -> ids map for substring terms of 3+
+# characters, and a word prefix -> ids map of the 1 and 2 character prefixes of every word for
+# shorter terms, so no term ever collects its matches at search time. Every term of a query has
+# to match. Adding/editing/deleting one item only touches that item's entries, and sync() brings
+# the whole index in line with a catalog a chunk at a time, so it is built and reloaded in place
+# between Tk events instead of freezing the window.
+
+import re
+import unicodedata
+from collections import defaultdict
+
+# Words, and every other non-space character (emoji, symbols) as a word of its own
+TOKEN = re.compile(r'\w+|[^\w\s]')
+# Emoji presentation selectors and zero width joiners, so '❤️' and '❤' search alike
+INVISIBLE = dict.fromkeys(map(ord, '\ufe0e\ufe0f\u200d'))
+# Items indexed per sync() step, a few milliseconds of work
+SYNC_CHUNK = 250
+
+
+def normalize(text):
+    return unicodedata.normalize('NFKC', text).casefold().translate(INVISIBLE).replace('_', ' ')
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def prefixes(text):
+    """1 and 2 character prefixes of the words of a normalized text"""
+    return {word[:size] for word in TOKEN.findall(text) for size in (1, 2)}
+
+
+class SearchIndex:
+    def __init__(self, ids=(), names=()):
+        # id -> normalized name
+        self.texts = {}
+        # trigram -> ids of the names containing it
+        self.grams = defaultdict(set)
+        # 1-2 character word prefix -> ids of the names having a word starting with it
+        self.prefixes = defaultdict(set)
+        for item_id, name in zip(ids, names):
+            self.add(item_id, name)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def add(self, item_id, name):
+        text = self.texts[item_id] = normalize(name)
+        for gram in trigrams(text):
+            self.grams[gram].add(item_id)
+        for prefix in prefixes(text):
+            self.prefixes[prefix].add(item_id)
+
+    def remove(self, item_id):
+        text = self.texts.pop(item_id, None)
+        if text is None:
+            return
+        for postings, keys in ((self.grams, trigrams(text)), (self.prefixes, prefixes(text))):
+            for key in keys:
+                ids = postings[key]
+                ids.discard(item_id)
+                if not ids:
+                    del postings[key]
+
+    def update(self, item_id, name):
+        if self.texts.get(item_id) != normalize(name):
+            self.remove(item_id)
+            self.add(item_id, name)
+
+    def sync(self, catalog, chunk=SYNC_CHUNK):
+        """Generator bringing the index in line with a catalog (core.Catalog), yielding between chunks
+
+        The catalog may be edited between steps: items are looked up by id when their turn comes.
+        """
+        ids = catalog.ids[:]
+        for start in range(0, len(ids), chunk):
+            for item_id in ids[start:start + chunk]:
+                position = catalog.position_of(item_id)
+                if position is None:
+                    self.remove(item_id)
+                else:
+                    self.update(item_id, catalog.names[position])
+            yield
+        # Then drop what the catalog no longer has (e.g. after a reload)
+        indexed = list(self.texts)
+        for start in range(0, len(indexed), chunk * 10):
+            for item_id in indexed[start:start + chunk * 10]:
+                if catalog.position_of(item_id) is None:
+                    self.remove(item_id)
+            yield
+
+    def _term_ids(self, term):
+        """Ids matching one term; for short terms the index's own set, not to be modified"""
+        if len(term) < 3:
+            return self.prefixes.get(term, set())
+        # Substring: ids having all its trigrams (rarest first), then checked on the text
+        postings = sorted((self.grams.get(gram, set()) for gram in trigrams(term)), key=len)
+        ids = postings[0].intersection(*postings[1:])
+        if len(term) > 3:
+            ids = {item_id for item_id in ids if term in self.texts[item_id]}
+        return ids
+
+    def search(self, query):
+        """Ids of the items matching every term of the query, None for an empty query (no filter)"""
+        terms = TOKEN.findall(normalize(query))
+        if not terms:
+            return None
+        # Smallest match sets first, so the running intersection stays small
+        found = sorted((self._term_ids(term) for term in set(terms)), key=len)
+        ids = set(found[0])
+        for term_ids in found[1:]:
+            if not ids:
+                break
+            ids &= term_ids
+        return ids
+
+    def matches(self, item_id, query):
+        """Whether one indexed item matches the query (same rules as search())"""
+        text = self.texts.get(item_id)
+        if text is None:
+            return False
+        words = TOKEN.findall(text)
+        for term in TOKEN.findall(normalize(query)):
+            if len(term) < 3:
+                if not any(word.startswith(term) for word in words):
+                    return False
+            elif term not in text:
+                return False
+        return True
@@ -0,0 +1,86 @@
+# State derived from the ledger and saved next to it, shared by the rollups and the streaks
+# A sidecar folds every ledger event into its own state (subclasses say how) and keeps it in a
+# CSV file with the seq of the newest event folded in, so on start only the ledger tail after
+# that seq is replayed. The seq has a marker row without a user, so it never goes back when the
+# rows of a deleted user are dropped. Events are folded on the Tk thread while the persistence
+# thread saves, everything runs under one lock.
+
+import csv
+import threading
+
+from storage import atomic_write
+
+
+class LedgerSidecar:
+    # CSV header: the user first and last_seq last
+    COLUMNS = ['user', 'last_seq']
+
+    def __init__(self, path):
+        self.path = path
+        # Seq of the newest ledger event folded in
+        self.seq = 0
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, newline='', encoding='utf-8') as f:
+                reader = csv.DictReader(f)
+                if reader.fieldnames != self.COLUMNS:
+                    # Saved by an older version in another layout: rebuilt from the whole ledger
+                    return
+                for row in reader:
+                    self.seq = max(self.seq, int(row['last_seq']))
+                    if row['user']:
+                        self._load_row(row)
+        except FileNotFoundError:
+            pass
+
+    def catch_up(self, ledger):
+        """Fold in every ledger event newer than the saved state"""
+        for event in ledger.events_since(self.seq):
+            self.add(event)
+
+    def add(self, event):
+        """Fold one ledger event (seq, timestamp, user, kind, item, delta, item_id)"""
+        with self._lock:
+            if event[0] <= self.seq:
+                return
+            self.seq = event[0]
+            if self._fold(event):
+                self._dirty = True
+
+    def forget(self, user):
+        """Drop everything of a deleted user, so a new user of that name starts from nothing"""
+        with self._lock:
+            if self._forget(user):
+                self._dirty = True
+
+    def save(self):
+        """Rewrite the file if anything was folded in or dropped since the last save"""
+        with self._lock:
+            if not self._dirty:
+                return
+            rows = [[''] * (len(self.COLUMNS) - 1) + [self.seq]] + self._rows()
+            self._dirty = False
+        atomic_write(self.path, self.COLUMNS, rows)
+
+    # ---------------Subclass_Hooks----------------------
+    # All called under the lock
+    def _load_row(self, row):
+        """Restore the state of one saved row (a dict by COLUMNS)"""
+        raise NotImplementedError
+
+    def _fold(self, event):
+        """Fold a new event into the state, True if the state changed"""
+        raise NotImplementedError
+
+    def _forget(self, user):
+        """Drop the state of a user, True if there was any"""
+        raise NotImplementedError
+
+    def _rows(self):
+        """The state as a list of rows in COLUMNS order"""
+        raise NotImplementedError
+    # ---------------------------------------------------
@@ -0,0 +1,645 @@
+# Storage layer shared by the GUI and the Console version
+# Both front ends only talk to a storage object, never to the files directly:
+#   CsvStorage    - the plain users/activities/rewards/achievements CSV files (default),
+#                   with a binary columnar snapshot per file in .snapshots/ for fast startup
+#   SqliteStorage - everything in one indexed rewards.db, single-row updates are point writes
+# CSV files stay the import/export format: `python storage.py to-sqlite` / `to-csv`
+
+import atexit
+import csv
+import functools
+import io
+import os
+import pickle
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import zlib
+
+DB_FILE = 'rewards.db'
+SNAPSHOT_DIR = '.snapshots'
+
+# Seconds a CSV rewrite waits so a burst of edits to the same file costs one write + fsync
+GROUP_COMMIT_WINDOW = 0.2
+# Coarsest file mtime resolution (FAT): a file modified this close to its snapshot could have
+# changed again without its mtime/size changing, so only then the content is checksummed
+RACY_WINDOW_NS = 2 * 10**9
+
+# Column order and type of every table, the CSV header follows the same order
+SCHEMAS = {
+    'users': [('name', str), ('total_points', int), ('activities_completed', int),
+              ('alltime_points', int), ('ledger_seq', int)],
+    'activities': [('activity_id', int), ('activity_name', str), ('activity_points', int), ('daily_task', bool)],
+    'rewards': [('reward_id', int), ('reward_name', str), ('reward_price', int), ('regular_reward', bool)],
+    'achievements': [('achievement_name', str), ('points_required', int), ('tasks_required', int)],
+    # Activity reminders (by activity id): weekday 0 (Monday)..6, or -1 for every day, at a local 'HH:MM'
+    'schedules': [('user', str), ('activity_id', int), ('weekday', int), ('at', str)],
+}
+
+# Name column of each table (indexed in SQLite)
+NAME_COLUMNS = {
+    'users': 'name',
+    'activities': 'activity_name',
+    'rewards': 'reward_name',
+    'achievements': 'achievement_name',
+    'schedules': 'user',
+}
+
+
+# Stable numeric id of each item table, files from older versions get them on first load
+ID_COLUMNS = {
+    'activities': 'activity_id',
+    'rewards': 'reward_id',
+}
+
+
+def column_names(table):
+    return [col for col, _ in SCHEMAS[table]]
+
+
+def assign_ids(ids):
+    """Give every missing (0) or duplicate id the next free one in place, return the changed positions"""
+    seen = set()
+    changed = []
+    next_id = max(ids, default=0) + 1
+    for position, item_id in enumerate(ids):
+        if item_id <= 0 or item_id in seen:
+            ids[position] = next_id
+            next_id += 1
+            changed.append(position)
+        seen.add(ids[position])
+    return changed
+
+
+def _convert(value, kind):
+    """Turn a raw CSV/SQLite value into the column type"""
+    if kind is bool:
+        if isinstance(value, str):
+            return value.strip().lower() in ['true', '1', 'yes', 'y']
+        return bool(value)
+    if kind is int:
+        if value is None or value == '':
+            return 0
+        return int(float(value))
+    return str(value)
+
+
+def _typed_row(table, values):
+    """Build a row dict from raw values, filling columns missing in older files"""
+    row = {}
+    for col, kind in SCHEMAS[table]:
+        row[col] = _convert(values.get(col, 0 if kind is not str else ''), kind)
+    return row
+
+
+def atomic_write(path, header, values):
+    """Write a CSV file via a temp file + rename, so it is never observably half-written"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f'.{os.path.basename(path)}.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(header)
+            writer.writerows(values)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    # Persist the rename itself (not possible on Windows, where the rename is already durable)
+    if os.name != 'nt':
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+class CsvStorage:
+    def __init__(self, directory='.'):
+        self.directory = directory
+        # Each table as last loaded/written, column by column ({column: list of values})
+        self._columns = {}
+        # Group commit: tables waiting to be rewritten once the window closes
+        self._pending = set()
+        self._timer = None
+        self._lock = threading.RLock()
+        # Serializes the actual file writes so an older snapshot never lands after a newer one
+        self._io_lock = threading.Lock()
+        # (path, mtime, size) of each file as last read or written by us
+        self._signatures = {}
+        # Tables appended to since their snapshot was written, re-snapshotted on close()
+        self._stale_snapshots = set()
+        # name -> positions in the cached users table, rebuilt only after users were added/removed
+        self._user_index = None
+        # Next free item id of each loaded item table, so an insert never scans the ids
+        self._next_ids = {}
+        atexit.register(self.flush)
+
+    def path(self, table):
+        return os.path.join(self.directory, f'{table}.csv')
+
+    def _signature(self, table):
+        path = self.path(table)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (path, stat.st_mtime_ns, stat.st_size)
+
+    def changed(self, table):
+        """True if the file was modified by someone else since we last read or wrote it"""
+        return self._signatures.get(table) != self._signature(table)
+
+    # ---------------Snapshot_Cache----------------------
+    def _snapshot_path(self, table):
+        return os.path.join(self.directory, SNAPSHOT_DIR, f'{table}.pickle')
+
+    def _read_snapshot(self, table, signature):
+        """The snapshot if it was taken from a file with this mtime/size, else None (the CSV is not read)"""
+        try:
+            with open(self._snapshot_path(table), 'rb') as f:
+                snapshot = pickle.load(f)
+        except (OSError, pickle.PickleError, EOFError, AttributeError, ValueError):
+            return None
+        # Only files already in the current column layout are snapshotted (older ones are rewritten first)
+        if snapshot.get('signature') != signature[1:] or snapshot.get('header') != column_names(table):
+            return None
+        return snapshot
+
+    def _write_snapshot(self, table, columns, signature, crc):
+        """Store the parsed table column by column next to the CSV (best effort, it is only a cache)"""
+        if signature is None:
+            return
+        snapshot = {'signature': signature[1:], 'crc': crc, 'header': column_names(table),
+                    'columns': columns, 'taken': time.time_ns()}
+        path = self._snapshot_path(table)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    def _refresh_snapshot(self, table, columns):
+        """Re-snapshot a table after we wrote its CSV"""
+        try:
+            with open(self.path(table), 'rb') as f:
+                content = f.read()
+        except OSError:
+            return
+        self._write_snapshot(table, columns, self._signature(table), zlib.crc32(content))
+    # ---------------------------------------------------
+
+    def load_columns(self, table):
+        """Return a table column by column, straight from the snapshot when the CSV is unchanged"""
+        if table in self._pending:
+            self.flush()
+        # Taken before reading, so a change made while reading is still detected later
+        signature = self._signature(table)
+        snapshot = None if signature is None else self._read_snapshot(table, signature)
+        content = None
+        if snapshot is not None and signature[1] + RACY_WINDOW_NS > snapshot.get('taken', 0):
+            # Same mtime/size but modified close to the snapshot: compare the content too
+            with open(self.path(table), 'rb') as f:
+                content = f.read()
+            if snapshot.get('crc') != zlib.crc32(content):
+                snapshot = None
+            elif time.time_ns() > signature[1] + RACY_WINDOW_NS:
+                # Verified, and no longer racy: re-stamp it so later starts skip the read
+                self._write_snapshot(table, snapshot['columns'], signature, snapshot['crc'])
+        if snapshot is not None:
+            columns = snapshot['columns']
+            migrated = False
+        else:
+            # Source changed (or first start): parse the CSV text and snapshot it
+            if content is None:
+                with open(self.path(table), 'rb') as f:
+                    content = f.read()
+            text = content.decode('utf-8-sig' if content.startswith(b'\xef\xbb\xbf') else 'utf-8')
+            reader = csv.DictReader(io.StringIO(text, newline=''))
+            rows = [_typed_row(table, values) for values in reader]
+            columns = {col: [row[col] for row in rows] for col in column_names(table)}
+            migrated = table in ID_COLUMNS and assign_ids(columns[ID_COLUMNS[table]])
+            # A file from an older version (columns missing) is rewritten with the current header,
+            # rows appended later would not line up with it otherwise
+            migrated = migrated or reader.fieldnames != column_names(table)
+            if not migrated:
+                self._write_snapshot(table, columns, signature, zlib.crc32(content))
+        with self._lock:
+            self._columns[table] = columns
+            self._signatures[table] = signature
+            self._stale_snapshots.discard(table)
+            if table == 'users':
+                self._user_index = None
+            if table in ID_COLUMNS:
+                self._next_ids[table] = max(columns[ID_COLUMNS[table]], default=0) + 1
+        if migrated:
+            # Write the new ids/columns back so they stay the same on the next start
+            self._write(table)
+        return {col: list(values) for col, values in columns.items()}
+
+    def load(self, table):
+        """Return all rows of a table as a list of dicts"""
+        columns = self.load_columns(table)
+        return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+    def _cached(self, table):
+        if table not in self._columns:
+            self.load_columns(table)
+        return self._columns[table]
+
+    def _write(self, table):
+        """Schedule an atomic rewrite of the table, coalesced with other writes in the window"""
+        with self._lock:
+            self._pending.add(table)
+            if self._timer is None:
+                self._timer = threading.Timer(GROUP_COMMIT_WINDOW, self._flush_later)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _flush_later(self):
+        """Group commit timer: nobody waits for it, a failed table is reported by the next flush()"""
+        try:
+            self.flush()
+        except OSError:
+            pass
+
+    def flush(self):
+        """Write every pending table now: one temp file, one fsync and one rename per table
+
+        A table that could not be written stays pending (the next flush tries again) and the
+        error is raised to the caller.
+        """
+        with self._io_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                snapshots = {table: {col: list(values) for col, values in self._columns[table].items()}
+                             for table in self._pending}
+                self._pending = set()
+            unwritten = list(snapshots)
+            for table, columns in snapshots.items():
+                try:
+                    atomic_write(self.path(table), column_names(table), zip(*columns.values()))
+                except BaseException:
+                    with self._lock:
+                        self._pending.update(unwritten)
+                    raise
+                unwritten.remove(table)
+                self._signatures[table] = self._signature(table)
+                self._refresh_snapshot(table, columns)
+                self._stale_snapshots.discard(table)
+
+    def _header(self, table):
+        """Column names in the first line of the CSV file, None if there is no file"""
+        try:
+            with open(self.path(table), newline='', encoding='utf-8-sig') as f:
+                return next(csv.reader(f), [])
+        except FileNotFoundError:
+            return None
+
+    def insert(self, table, row):
+        """Append one row at the end of the file"""
+        row = _typed_row(table, row)
+        if table not in self._columns and self._header(table) not in (None, [], column_names(table)):
+            # Older column layout: loading it queues the rewrite, which then carries the new row
+            self._cached(table)
+        if table in ID_COLUMNS:
+            self._take_id(table, row)
+        with self._io_lock:
+            with self._lock:
+                # Only keep the cache current, never read the whole file just to append
+                columns = self._columns.get(table)
+                if columns is not None:
+                    for col, values in columns.items():
+                        values.append(row[col])
+                    if table == 'users' and self._user_index is not None:
+                        self._user_index.setdefault(row['name'], []).append(len(columns['name']) - 1)
+                if table in self._pending:
+                    # The pending rewrite already contains the new row
+                    return
+            path = self.path(table)
+            # Ensure the CSV file ends with a newline before appending to avoid concatenation with the last line
+            try:
+                with open(path, 'rb+') as f:
+                    f.seek(0, 2)
+                    if f.tell() > 0:
+                        f.seek(-1, 2)
+                        last = f.read(1)
+                        if last != b'\n':
+                            f.write(b'\n')
+            except FileNotFoundError:
+                pass
+            write_header = not os.path.exists(path) or os.path.getsize(path) == 0
+            with open(path, 'a', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f, lineterminator='\n')
+                if write_header:
+                    writer.writerow(column_names(table))
+                writer.writerow([row[col] for col in column_names(table)])
+            if columns is not None:
+                self._signatures[table] = self._signature(table)
+                # Rewriting the snapshot here would make every append O(n), do it on close()
+                self._stale_snapshots.add(table)
+
+    def _take_id(self, table, row):
+        """Give a row without an id the next free one, and keep the next free id past the row's"""
+        id_col = ID_COLUMNS[table]
+        with self._lock:
+            if table not in self._next_ids:
+                # First write to a table not loaded yet, the only time its ids are read
+                self._cached(table)
+            if row[id_col] <= 0:
+                row[id_col] = self._next_ids[table]
+            self._next_ids[table] = max(self._next_ids[table], row[id_col] + 1)
+
+    def replace(self, table, rows):
+        """Overwrite the whole table"""
+        rows = [_typed_row(table, row) for row in rows]
+        with self._lock:
+            self._columns[table] = {col: [row[col] for row in rows] for col in column_names(table)}
+            if table == 'users':
+                self._user_index = None
+            if table in ID_COLUMNS:
+                self._next_ids[table] = max(self._columns[table][ID_COLUMNS[table]], default=0) + 1
+        self._write(table)
+
+    def update(self, table, position, row):
+        """Replace the row at the given position"""
+        columns = self._cached(table)
+        row = _typed_row(table, row)
+        with self._lock:
+            if table in self._next_ids:
+                self._next_ids[table] = max(self._next_ids[table], row[ID_COLUMNS[table]] + 1)
+            for col, values in columns.items():
+                values[position] = row[col]
+            if table == 'users':
+                self._user_index = None
+        self._write(table)
+
+    def delete(self, table, position):
+        """Delete the row at the given position"""
+        columns = self._cached(table)
+        with self._lock:
+            for values in columns.values():
+                del values[position]
+            if table == 'users':
+                self._user_index = None
+        self._write(table)
+
+    def _user_positions(self):
+        if self._user_index is None:
+            index = {}
+            for position, name in enumerate(self._cached('users')['name']):
+                index.setdefault(name, []).append(position)
+            self._user_index = index
+        return self._user_index
+
+    def update_user(self, name, values):
+        """Update the columns given in values for the user(s) with that name"""
+        self.update_users({name: values})
+
+    def update_users(self, values_by_name):
+        """update_user for several users at once ({name: values}), one rewrite for all of them"""
+        if not values_by_name:
+            return
+        columns = self._cached('users')
+        with self._lock:
+            positions = self._user_positions()
+            for name, values in values_by_name.items():
+                for position in positions.get(name, ()):
+                    for col, value in values.items():
+                        columns[col][position] = value
+        self._write('users')
+
+    def delete_user(self, name):
+        """Delete the user(s) with that name"""
+        columns = self._cached('users')
+        with self._lock:
+            keep = [user_name != name for user_name in columns['name']]
+            for col, values in columns.items():
+                columns[col] = [value for value, kept in zip(values, keep) if kept]
+            self._user_index = None
+        self._write('users')
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            stale, self._stale_snapshots = self._stale_snapshots, set()
+        for table in stale:
+            self._refresh_snapshot(table, self._columns[table])
+
+
+def _synchronized(method):
+    """Run a SqliteStorage method under its connection lock"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class SqliteStorage:
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        # The GUI writes from its persistence thread while the Tk thread reads
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.RLock()
+        # Row ids in load order, so positions used by the front ends map to primary keys
+        self._ids = {}
+        # PRAGMA data_version at the last load of each table, it only moves on other connections' commits
+        self._versions = {}
+        # table -> (next free item id, data_version it is valid for)
+        self._next_ids = {}
+        self._create_tables()
+
+    def _create_tables(self):
+        sql_types = {str: 'TEXT', int: 'INTEGER', bool: 'INTEGER'}
+        with self.conn:
+            for table, schema in SCHEMAS.items():
+                cols = ', '.join(f'{col} {sql_types[kind]}' for col, kind in schema)
+                self.conn.execute(f'CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY, {cols})')
+                # Databases created by older versions lack the newer columns
+                existing = {info[1] for info in self.conn.execute(f'PRAGMA table_info({table})')}
+                for col, kind in schema:
+                    if col not in existing:
+                        self.conn.execute(f'ALTER TABLE {table} ADD COLUMN {col} {sql_types[kind]}')
+                self.conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_name ON {table} ({NAME_COLUMNS[table]})')
+                if table in ID_COLUMNS:
+                    self.conn.execute(
+                        f'CREATE INDEX IF NOT EXISTS idx_{table}_item_id ON {table} ({ID_COLUMNS[table]})')
+
+    @_synchronized
+    def is_empty(self):
+        return all(self.conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0] == 0
+                   for table in SCHEMAS)
+
+    def _data_version(self):
+        return self.conn.execute('PRAGMA data_version').fetchone()[0]
+
+    @_synchronized
+    def changed(self, table):
+        """True if another process committed to the database since the table was loaded"""
+        return self._versions.get(table) != self._data_version()
+
+    @_synchronized
+    def load(self, table):
+        """Return all rows of a table as a list of dicts"""
+        self._versions[table] = self._data_version()
+        cols = column_names(table)
+        cursor = self.conn.execute(f'SELECT id, {", ".join(cols)} FROM {table} ORDER BY id')
+        rows = []
+        ids = []
+        for record in cursor:
+            ids.append(record[0])
+            rows.append(_typed_row(table, dict(zip(cols, record[1:]))))
+        self._ids[table] = ids
+        if table in ID_COLUMNS:
+            id_col = ID_COLUMNS[table]
+            item_ids = [row[id_col] for row in rows]
+            changed = assign_ids(item_ids)
+            if changed:
+                with self.conn:
+                    self.conn.executemany(f'UPDATE {table} SET {id_col} = ? WHERE id = ?',
+                                          [(item_ids[position], ids[position]) for position in changed])
+                for position in changed:
+                    rows[position][id_col] = item_ids[position]
+        return rows
+
+    def load_columns(self, table):
+        """Return a table column by column ({column: list of values})"""
+        rows = self.load(table)
+        return {col: [row[col] for row in rows] for col in column_names(table)}
+
+    def _row_ids(self, table):
+        if table not in self._ids:
+            self.load(table)
+        return self._ids[table]
+
+    @_synchronized
+    def insert(self, table, row):
+        """Insert one row"""
+        row = _typed_row(table, row)
+        if table in ID_COLUMNS:
+            self._take_id(table, row)
+        cols = column_names(table)
+        with self.conn:
+            cursor = self.conn.execute(
+                f'INSERT INTO {table} ({", ".join(cols)}) VALUES ({", ".join("?" * len(cols))})',
+                [row[col] for col in cols])
+        if table in self._ids:
+            self._ids[table].append(cursor.lastrowid)
+
+    def _take_id(self, table, row):
+        """Give a row without an id the next free one, and keep the next free id past the row's"""
+        id_col = ID_COLUMNS[table]
+        version = self._data_version()
+        next_id, valid_for = self._next_ids.get(table, (None, None))
+        if valid_for != version:
+            # Another connection may have inserted meanwhile: one lookup in the id index
+            next_id = self.conn.execute(f'SELECT COALESCE(MAX({id_col}), 0) + 1 FROM {table}').fetchone()[0]
+        if row[id_col] <= 0:
+            row[id_col] = next_id
+        self._next_ids[table] = (max(next_id, row[id_col] + 1), version)
+
+    @_synchronized
+    def update(self, table, position, row):
+        """Replace the row at the given position"""
+        row = _typed_row(table, row)
+        cols = column_names(table)
+        with self.conn:
+            self.conn.execute(
+                f'UPDATE {table} SET {", ".join(f"{col} = ?" for col in cols)} WHERE id = ?',
+                [row[col] for col in cols] + [self._row_ids(table)[position]])
+
+    @_synchronized
+    def delete(self, table, position):
+        """Delete the row at the given position"""
+        ids = self._row_ids(table)
+        with self.conn:
+            self.conn.execute(f'DELETE FROM {table} WHERE id = ?', (ids[position],))
+        del ids[position]
+
+    def update_user(self, name, values):
+        """Update the columns given in values for the user(s) with that name"""
+        self.update_users({name: values})
+
+    @_synchronized
+    def update_users(self, values_by_name):
+        """update_user for several users at once ({name: values}), one transaction for all of them"""
+        with self.conn:
+            for name, values in values_by_name.items():
+                self.conn.execute(
+                    f'UPDATE users SET {", ".join(f"{col} = ?" for col in values)} WHERE name = ?',
+                    list(values.values()) + [name])
+
+    @_synchronized
+    def delete_user(self, name):
+        """Delete the user(s) with that name"""
+        with self.conn:
+            self.conn.execute('DELETE FROM users WHERE name = ?', (name,))
+        self._ids.pop('users', None)
+
+    def flush(self):
+        """Every write is committed when it is made, nothing is pending"""
+
+    @_synchronized
+    def close(self):
+        self.conn.close()
+
+
+# ---------------Import/Export----------------------
+def copy_tables(source, target):
+    """Copy every table from one storage into another (target tables must be empty)"""
+    for table in SCHEMAS:
+        try:
+            rows = source.load(table)
+        except FileNotFoundError:
+            continue
+        for row in rows:
+            target.insert(table, row)
+
+
+def open_storage(directory='.'):
+    """Pick the backend: REWARDS_STORAGE=sqlite|csv, otherwise SQLite only if rewards.db exists"""
+    db_path = os.path.join(directory, DB_FILE)
+    backend = os.environ.get('REWARDS_STORAGE', 'sqlite' if os.path.exists(db_path) else 'csv')
+    if backend == 'sqlite':
+        storage = SqliteStorage(db_path)
+        if storage.is_empty():
+            # First start on SQLite: import the existing CSV files
+            copy_tables(CsvStorage(directory), storage)
+        return storage
+    return CsvStorage(directory)
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+    if command == 'to-sqlite':
+        if os.path.exists(DB_FILE):
+            print(f'{DB_FILE} already exists!')
+            sys.exit(1)
+        db = SqliteStorage()
+        copy_tables(CsvStorage(), db)
+        db.close()
+        print(f'CSV files imported into {DB_FILE}')
+    elif command == 'to-csv':
+        db = SqliteStorage()
+        csv_storage = CsvStorage()
+        for table in SCHEMAS:
+            csv_storage.replace(table, db.load(table))
+        csv_storage.close()
+        db.close()
+        print(f'{DB_FILE} exported to CSV files')
+    else:
+        print('Usage: python storage.py to-sqlite | to-csv')
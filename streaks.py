@@ -0,0 +1,87 @@
+# Streaks of daily activities shared by the GUI and the Console version
+# Every completion moves one (user, activity id) streak in O(1): done again the same day changes
+# nothing, done the day after the last one extends it, otherwise it starts over at 1. A streak
+# whose last day is before yesterday is broken, which is worked out when it is read, so a day
+# rollover needs no pass over the streaks either. Like the rollups, the streaks are a ledger
+# sidecar (see sidecar.py) saved in ledger_streaks.csv. Streaks are kept for every activity;
+# the lists only show daily ones. They follow the stable activity id, so a renamed activity
+# keeps its streak and two activities of the same name have their own.
+
+import time
+
+from ledger import KIND_COMPLETE, local_day
+from sidecar import LedgerSidecar
+
+STREAKS_FILE = 'ledger_streaks.csv'
+
+
+def today():
+    return local_day(int(time.time()))
+
+
+class Streak:
+    __slots__ = ('current', 'longest', 'last_day', 'last_seq')
+
+    def __init__(self, current=0, longest=0, last_day=0, last_seq=0):
+        self.current = current
+        self.longest = longest
+        # Local day of the last completion (see ledger.local_day)
+        self.last_day = last_day
+        self.last_seq = last_seq
+
+    def complete(self, day):
+        if self.current and day == self.last_day:
+            return
+        self.current = self.current + 1 if day == self.last_day + 1 else 1
+        self.longest = max(self.longest, self.current)
+        self.last_day = day
+
+    def current_on(self, day):
+        """Streak length as of a day: still alive if the last completion was today or yesterday"""
+        return self.current if day - self.last_day <= 1 else 0
+
+
+class StreakEngine(LedgerSidecar):
+    COLUMNS = ['user', 'activity_id', 'current', 'longest', 'last_day', 'last_seq']
+
+    def __init__(self, path=STREAKS_FILE):
+        # (user, activity id) -> Streak
+        self.streaks = {}
+        super().__init__(path)
+
+    def _load_row(self, row):
+        self.streaks[(row['user'], int(row['activity_id']))] = Streak(
+            int(row['current']), int(row['longest']), int(row['last_day']), int(row['last_seq']))
+
+    def _fold(self, event):
+        """Only completions of an activity with an id move a streak"""
+        seq, timestamp, user, kind, item, delta, item_id = event
+        if kind != KIND_COMPLETE or not item_id:
+            return False
+        streak = self.streaks.get((user, item_id))
+        if streak is None:
+            streak = self.streaks[(user, item_id)] = Streak()
+        streak.complete(local_day(timestamp))
+        streak.last_seq = seq
+        return True
+
+    def _forget(self, user):
+        keys = [key for key in self.streaks if key[0] == user]
+        for key in keys:
+            del self.streaks[key]
+        return bool(keys)
+
+    def _rows(self):
+        return [(user, activity_id, streak.current, streak.longest, streak.last_day, streak.last_seq)
+                for (user, activity_id), streak in self.streaks.items()]
+
+    def get(self, user, activity_id):
+        """(current streak as of today, longest streak) of a user's activity"""
+        streak = self.streaks.get((user, activity_id))
+        if streak is None:
+            return 0, 0
+        return streak.current_on(today()), streak.longest
+
+    def done_today(self, user, activity_id):
+        streak = self.streaks.get((user, activity_id))
+        return streak is not None and streak.current > 0 and streak.last_day == today()
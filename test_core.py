@@ -0,0 +1,16 @@
+# Tests of the shared domain model (run with: python -m pytest)
+
+from core import User
+
+
+class ConsoleUser(User):
+    __slots__ = ()
+
+
+def test_to_row_round_trips_a_subclass():
+    user = ConsoleUser('Danny', 255, 120, 2065, 7)
+    row = user.to_row()
+    assert row == {'name': 'Danny', 'total_points': 255, 'activities_completed': 120,
+                   'alltime_points': 2065, 'ledger_seq': 7}
+    copy = ConsoleUser(**row)
+    assert copy.to_row() == row
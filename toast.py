@@ -0,0 +1,60 @@
+# In-window notifications for the GUI
+# Toasts stack up from the bottom right corner of the main window and dismiss themselves, so
+# hot actions (complete, redeem, save) report their result without a modal round-trip.
+# At most MAX_VISIBLE are on screen, the rest wait in a FIFO queue.
+
+from collections import deque
+import tkinter as tk
+
+# Milliseconds a toast stays up; highlighted ones (rank-ups) stay longer
+DURATION = 2500
+HIGHLIGHT_DURATION = 5000
+MAX_VISIBLE = 3
+HIGHLIGHT = 'rankup'
+
+
+class ToastQueue:
+    def __init__(self, root, styles):
+        """styles[level] -> (background, foreground); HIGHLIGHT toasts are larger and stay longer"""
+        self.root = root
+        self.styles = styles
+        # (message, level) waiting for a free slot
+        self.pending = deque()
+        # Toast labels on screen, oldest first
+        self.shown = []
+
+    def show(self, message, level='info'):
+        self.pending.append((message, level))
+        self._fill()
+
+    def _fill(self):
+        while self.pending and len(self.shown) < MAX_VISIBLE:
+            message, level = self.pending.popleft()
+            background, foreground = self.styles[level]
+            highlight = level == HIGHLIGHT
+            toast = tk.Label(self.root, text=message,
+                             font=('Consolas', 12 if highlight else 10, 'bold'),
+                             bg=background, fg=foreground,
+                             justify='left',
+                             padx=16, pady=12 if highlight else 8,
+                             relief='flat',
+                             cursor='hand2')
+            # Click to dismiss early
+            toast.bind('<Button-1>', lambda event, toast=toast: self.dismiss(toast))
+            self.shown.append(toast)
+            self.root.after(HIGHLIGHT_DURATION if highlight else DURATION, self.dismiss, toast)
+        self._place()
+
+    def dismiss(self, toast):
+        if toast in self.shown:
+            self.shown.remove(toast)
+            toast.destroy()
+            self._fill()
+
+    def _place(self):
+        """Stack the toasts upwards from the bottom right corner, newest at the bottom"""
+        y = -20
+        for toast in reversed(self.shown):
+            toast.place(relx=1.0, rely=1.0, x=-20, y=y, anchor='se')
+            toast.lift()
+            y -= toast.winfo_reqheight() + 8